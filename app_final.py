@@ -1,13 +1,11 @@
-from pyexpat import features
+import os
+
 import streamlit as st
-import pandas as pd
-import joblib
-import base64
-import json
-from pathlib import Path
-import xgboost as xgb
-from sklearn.preprocessing import StandardScaler
-from scipy.spatial.distance import cdist
+import assets
+import lookup_tables
+import metrics
+import model_registry
+import prediction_cache
 
 # === Page Configuration ===
 st.set_page_config(
@@ -16,6 +14,11 @@ st.set_page_config(
     layout="wide"
 )
 
+# Stage timings of this run, shown in the debug panel; histograms are process-wide (see metrics.py)
+run_trace = metrics.begin_trace()
+if os.environ.get("METRICS_PORT"):
+    metrics.start_exporter(int(os.environ["METRICS_PORT"]))
+
 # === GLOBAL DESIGN STYLES ===
 st.markdown(
     """
@@ -58,12 +61,12 @@ stadium_background = "stadium.jpg"
 logo_fc = "1-fc-koln-logo-png_seeklogo-266469.png"
 logo_uni = "Uni_blau2.png"
 
-def set_bg_image_with_overlay(image_path):
-    with open(image_path, "rb") as img_file:
-        img_base64 = base64.b64encode(img_file.read()).decode()
+# Images are resized once into static/ and referenced by URL (see assets.py)
+STATIC_SERVING = st.get_option("server.enableStaticServing")
 
-    st.markdown(
-    f"""
+@st.cache_data
+def background_css(image_url):
+    return f"""
     <style>
     @keyframes fadeIn {{
         from {{opacity: 0;}}
@@ -72,7 +75,7 @@ def set_bg_image_with_overlay(image_path):
 
     .stApp {{
         background: linear-gradient(rgba(0,0,0,0.7), rgba(0,0,0,0.7)),
-                    url("data:image/png;base64,{img_base64}");
+                    url("{image_url}");
         background-size: cover;
         background-position: center;
         background-attachment: fixed;
@@ -102,20 +105,14 @@ def set_bg_image_with_overlay(image_path):
         padding-top: 2rem;
     }}
     </style>
-    """,
-    unsafe_allow_html=True
-)
-
-# === BACKGROUND INIT ===
-set_bg_image_with_overlay(stadium_background)
-
+    """
 
-##Loading Dataset
-@st.cache_data
-def load_player_reference_data():
-    return pd.read_csv("final_dataset.csv")
+def set_bg_image_with_overlay(image_path):
+    st.markdown(background_css(assets.asset_url(image_path, STATIC_SERVING)), unsafe_allow_html=True)
 
-reference_df = load_player_reference_data()
+# === BACKGROUND INIT ===
+with metrics.span("load.background"):
+    set_bg_image_with_overlay(stadium_background)
 
 
 # === HELP ICON ===
@@ -166,14 +163,14 @@ with col_title:
 
 with col_fc:
     st.markdown("<div style='margin-top: 1.5rem;'>", unsafe_allow_html=True)
-    st.image(logo_fc, width=90)
+    st.image(assets.asset_path(logo_fc), width=90)
     st.markdown("</div>", unsafe_allow_html=True)
 
 with col_uni:
     st.markdown(
         f"""
         <div style='text-align: right;'>
-            <img src="data:image/png;base64,{base64.b64encode(open(logo_uni, "rb").read()).decode()}" width="150">
+            <img src="{assets.asset_url(logo_uni, STATIC_SERVING)}" width="150">
         </div>
         """,
         unsafe_allow_html=True
@@ -195,18 +192,15 @@ def card_end():
 
 
 # === Load Model and Mappings ===
-model = xgb.XGBRegressor()
-model.load_model("model2.json")
+# Models are loaded once per process and shared by all sessions (see model_registry.py).
+# XGBoost and the GAM metamodel are only loaded when a prediction is requested.
+prediction_version = prediction_cache.version_of("model2.json", "gam_model.pkl", "final_dataset.csv",
+                                                "xgboost_predictions_test.csv")
 
-
-# Load GAM metamodel
-gam_model = joblib.load("gam_model.pkl")
-
-@st.cache_data
-def load_mapping():
-    with open("category_mappings.json") as f:
-        return json.load(f)
-category_mappings = load_mapping()
+# Mappings and derived lookup tables are cached on disk and per process (see lookup_tables.py)
+with metrics.span("load.mappings"):
+    lookups = lookup_tables.load_lookups("xgboost_predictions_test.csv", "category_mappings.json")
+category_mappings = lookups["category_mappings"]
 
 
 
@@ -218,36 +212,25 @@ valid_feet = category_mappings["foot"]
 valid_clean_sheets = category_mappings.get("clean_sheets_before_grouped", ["0-1", "2-4", "5-9", "10-14", "15+"])
 valid_scorer_groups = category_mappings.get("scorer_before_grouped_category", ["defender/goalkeeper", "0-3", "4-6", "7-10", "11-15", "16-20", "21-30", "30+"])
 # Dynamic mapping from real data
-position_group_to_main = pd.read_csv("xgboost_predictions_test.csv").groupby("positionGroup")["mainPosition"].unique().apply(list).to_dict()
-
-area_to_levels = {
-    'Austria': [1, 2], 'Belgium': [1, 2], 'Bosnia-Herzegovina': [1], 'Bulgaria': [1], 'Canada': [1],
-    'Croatia': [1, 2], 'Czech Republic': [1], 'Denmark': [1, 2], 'England': [1, 2, 3, 4], 'Estonia': [1],
-    'Finland': [1, 2], 'France': [1, 2, 3], 'Georgia': [1], 'Germany': [1, 2, 3, 4], 'Greece': [1],
-    'Hungary': [1], 'Ireland': [1], 'Israel': [1], 'Italy': [1, 2], 'Japan': [1], 'Korea, South': [1],
-    'Latvia': [1], 'Lithuania': [1], 'Luxembourg': [1], 'Malta': [1], 'Moldova': [1], 'Montenegro': [1],
-    'Netherlands': [1, 2], 'Northern Ireland': [1], 'Norway': [1, 2], 'Poland': [1], 'Portugal': [1, 2],
-    'Romania': [1], 'Russia': [1], 'Saudi Arabia': [1], 'Scotland': [1], 'Serbia': [1], 'Slovakia': [1],
-    'Slovenia': [1], 'Spain': [1, 2], 'Sweden': [1, 2], 'Switzerland': [1, 2], 'Türkiye': [1],
-    'Ukraine': [1], 'United States': [1, 2, 3], 'Wales': [1]
-}
+position_group_to_main = lookups["position_group_to_main"]
+area_to_levels = lookups["area_to_levels"]
 
 
 # === Inputs ===
 
-def help_input(label, tooltip_text):
-    st.markdown(f"""
+# Tooltip styles are global, so they are emitted once per run instead of once per input
+st.markdown("""
     <style>
-    .help-icon {{
+    .help-icon {
         display: inline-block;
         position: relative;
         cursor: pointer;
         margin-left: 8px;
         color: #FFD700;
         font-weight: bold;
-    }}
+    }
 
-    .tooltip {{
+    .tooltip {
         display: none;
         position: absolute;
         top: 22px;
@@ -262,13 +245,16 @@ def help_input(label, tooltip_text):
         box-shadow: 0 4px 10px rgba(0,0,0,0.3);
         white-space: normal;
         line-height: 1.4;
-    }}
+    }
 
-    .help-icon:hover .tooltip {{
+    .help-icon:hover .tooltip {
         display: block;
-    }}
+    }
     </style>
+""", unsafe_allow_html=True)
 
+def help_input(label, tooltip_text):
+    st.markdown(f"""
     <div style='margin-bottom: -15px'>
         <label style='font-weight:600;'>{label}</label>
         <span class="help-icon">❓
@@ -365,7 +351,8 @@ with col2:
 foreign_transfer = int((from_area != to_area))
 
 
-data = {col: 0 for col in model.feature_names_in_}
+with metrics.span("load.feature_names"):
+    data = {col: 0 for col in model_registry.feature_names("model2.json")}
 data.update({
     'height': height,
     'transferAge': transfer_age,
@@ -391,13 +378,28 @@ data.update({
     'team_market_value_relation': to_team_market_value / from_team_market_value if from_team_market_value > 0 else 0
 })
 
+# ÄHNLICHKEITSBERECHNUNG (inputs for the similar-transfer search and neighbourhood statistics)
+input_query = {
+    #"height": height,
+    "mainPosition": main_position,
+    "positionGroup": position_group,  # used when the search widens to the position group
+    #"foot": foot,
+    "transferAge": transfer_age,
+    "marketvalue_closest": market_value,
+    #"toTeam_marketValue": to_team_market_value,
+    #"fromTeam_marketValue": from_team_market_value,
+    "percentage_played_before": percentage_played_before,
+    "scorer_before_grouped_category": scorer_raw,
+    #"clean_sheets_before": clean_sheets_before,  # Falls du das dynamisch brauchst, kannst du das noch einbauen
+    #"value_age_product": transfer_age * market_value,
+    #"value_per_age": market_value / transfer_age if transfer_age > 0 else 0,
+    'from_competition_competition_area': from_area,
+    'to_competition_competition_area': to_area,
+    'from_competition_competition_level': from_level,
+    'to_competition_competition_level': to_level,
+    'team_market_value_relation': to_team_market_value / from_team_market_value if from_team_market_value > 0 else 0
 
-input_df = pd.DataFrame([data])
-
-# Category typing
-for col, cats in category_mappings.items():
-    if col in input_df.columns:
-        input_df[col] = pd.Categorical(input_df[col], categories=cats)
+}
 
 
 # === ACTION BUTTONS & OUTPUT ===
@@ -415,126 +417,191 @@ def hex_to_rgba(hex_color, alpha=0.5):
 
 # Prediction
 if predict_clicked:
-    with st.spinner("Running prediction..."):
-        # Original model prediction
-        xgb_pred = model.predict(input_df)  # returns an array
-        
-        # GAM metamodel prediction based on original model's output
-        final_pred = gam_model.predict(xgb_pred.reshape(-1, 1))
-                # ÄHNLICHKEITSBERECHNUNG
-        input_query = {
-            #"height": height,
-            "mainPosition": main_position,
-            #"positionGroup": position_group,
-            #"foot": foot,
-            "transferAge": transfer_age,
-            "marketvalue_closest": market_value,
-            #"toTeam_marketValue": to_team_market_value,
-            #"fromTeam_marketValue": from_team_market_value,
-            "percentage_played_before": percentage_played_before,
-            "scorer_before_grouped_category": scorer_raw,
-            #"clean_sheets_before": clean_sheets_before,  # Falls du das dynamisch brauchst, kannst du das noch einbauen
-            #"value_age_product": transfer_age * market_value,
-            #"value_per_age": market_value / transfer_age if transfer_age > 0 else 0,
-            'from_competition_competition_area': from_area,
-            'to_competition_competition_area': to_area,
-            'from_competition_competition_level': from_level,
-            'to_competition_competition_level': to_level,
-            'team_market_value_relation': to_team_market_value / from_team_market_value if from_team_market_value > 0 else 0
-
-        }
-
-        # === ÄHNLICHE SPIELER FINDEN ===
-        def find_similar_players(input_data, df, top_n=3):
-            features = list(input_data.keys())
-            id_cols = ['playerId', 'playerName', 'mainPosition', "percentage_played", 'season']
-
-            # 👇 Neu: doppelte Spaltennamen vermeiden
-            all_cols = list(dict.fromkeys(features + id_cols))
-
-            df_subset = df[all_cols].dropna().copy()
-            df_subset.reset_index(drop=True, inplace=True)
-
-            for col in df_subset.select_dtypes(include='object').columns:
-                df_subset[col] = df_subset[col].astype(str)
-                if col in input_data:
-                    input_data[col] = str(input_data[col])
-
-            df_subset = df_subset[
-             (df_subset['mainPosition'] == input_data['mainPosition']) &
-             (df_subset['from_competition_competition_level'] == input_data['from_competition_competition_level']) &
-             (df_subset['to_competition_competition_level'] == input_data['to_competition_competition_level'])
-            ].copy()
-
-            df_subset = df_subset.sort_values("season", ascending=False).drop_duplicates("playerId", keep="first").reset_index(drop=True)
-
-            df_encoded = pd.get_dummies(df_subset[features])
-            input_encoded = pd.get_dummies(pd.DataFrame([input_data]))
-            df_encoded, input_encoded = df_encoded.align(input_encoded, join="inner", axis=1)
-
-            scaler = StandardScaler()
-            df_scaled = scaler.fit_transform(df_encoded)
-            input_scaled = scaler.transform(input_encoded)
-
-            df_subset["distance"] = cdist(df_scaled, input_scaled).flatten()
-            return df_subset.nsmallest(top_n, "distance")[["playerName", "mainPosition", "season", "percentage_played", "distance"]]
-
-
-        similar_players = find_similar_players(input_query, reference_df)
-
-
-        if final_pred < 35:
-            msg, color = "Not Recommended", "#FF4B4B"
-        elif final_pred < 55:
-            msg, color = "Expected to Be a Substitute", "#FFA500"
-        elif final_pred < 75:
-            msg, color = "Expected to Be a Rotation Player", "#32CD32"
+    # Identical feature vectors on the same model versions are served from the cache
+    with metrics.span("cache_lookup"):
+        cache_key = prediction_cache.feature_key(data, category_mappings, prediction_version, input_query)
+        result = prediction_cache.cache.get(cache_key)
+    if result is None:
+        with st.spinner("Running prediction..."):
+            # numpy/pandas/xgboost are imported on the first prediction, not at startup
+            import engine
+            import similarity_index
+
+            spec = engine.get_spec("general")
+            with metrics.span("load.models"):
+                spec.warm()
+            # XGBoost + GAM metamodel through the shared engine (fast-path single-row encoder, see engine.py);
+            # the P10–P90 band comes from the held-out residuals, see intervals.py
+            final_pred, p10, p90 = spec.predict_one_with_interval(data)
+
+            # === ÄHNLICHE SPIELER FINDEN ===
+            # Prebuilt per-partition index, see similarity_index.py
+            with metrics.span("load.reference_index"):
+                similarity_index.get_tiered_index()
+            with metrics.span("similarity"):
+                # Widens to adjacent levels / the position group when the exact combination is rare
+                similar_players, similarity_tier = similarity_index.find_similar_players_tiered(input_query)
+
+
+            if final_pred < 35:
+                msg, color = "Not Recommended", "#FF4B4B"
+            elif final_pred < 55:
+                msg, color = "Expected to Be a Substitute", "#FFA500"
+            elif final_pred < 75:
+                msg, color = "Expected to Be a Rotation Player", "#32CD32"
+            else:
+                msg, color = "Expected to Be a Key Player", "#008000"
+
+            result = {"score": final_pred, "p10": p10, "p90": p90, "msg": msg, "color": color, "similar_players": similar_players,
+                      "similarity_tier": similarity_index.TIER_LABELS[similarity_tier]}
+            prediction_cache.cache.put(cache_key, result)
+
+    final_pred, msg, color, similar_players = result["score"], result["msg"], result["color"], result["similar_players"]
+
+    rgba_bg = hex_to_rgba(color, alpha=0.6)  # 0.6 ist die Transparenz
+
+    with col_m, metrics.span("render"):
+        st.markdown(f"""
+        <div style='
+            background-color: {rgba_bg};
+            height: 96px;
+            display: flex;
+            flex-direction: column;
+            justify-content: center;
+            border-radius: 12px;
+            text-align: center;
+            letter-spacing: 0.5px;
+            box-shadow: 0 4px 12px rgba(0,0,0,0.3);'>
+            <span style='color: white; font-size: 1.3rem; font-weight: 600;'>
+                {msg} – Expected Playing Time: <strong>{final_pred:.2f}%</strong>
+            </span>
+            <span style='color: white; font-size: 0.95rem; opacity: 0.9;'>
+                P10–P90 range: {result['p10']:.1f}% – {result['p90']:.1f}%
+            </span>
+        </div>
+        """, unsafe_allow_html=True)
+        st.markdown("### 👥 Top 3 Similar Transfers")
+        st.caption(f"Matched on: {result['similarity_tier']}")
+        for _, row in similar_players.iterrows():
+            st.markdown(f"- **{row['playerName']}** | Position: {row['mainPosition']} | Season: {row['season']} | Playing %: {row['percentage_played']}%")
+
+    
+# === Neighbourhood Statistics ===
+if st.checkbox("📊 Playing Time of Similar Transfers"):
+    # Distribution over the top-k similar transfers; whole-partition summaries are precomputed in the index
+    import pandas as pd
+    import similarity_index
+
+    k = st.slider("Number of similar transfers", 10, similarity_index.MAX_NEIGHBOURS, 100, step=10, key="neighbourhood_k")
+    summary, tier = similarity_index.neighbourhood_stats(input_query, k)
+    if summary["n"] == 0:
+        st.info("No comparable transfers in the reference data.")
+    else:
+        st.caption(f"{summary['n']} transfers, matched on: {similarity_index.TIER_LABELS[tier]}")
+        st.dataframe({"Mean": [summary["mean"]], **{name: [value] for name, value in summary["quantiles"].items()}},
+                     use_container_width=True)
+        edges = summary["histogram"]["edges"]
+        st.bar_chart(pd.DataFrame(
+            {"Transfers": summary["histogram"]["counts"]},
+            index=[f"{lo:.0f}–{hi:.0f}%" for lo, hi in zip(edges[:-1], edges[1:])],
+        ))
+
+# === Prediction Explanation ===
+if st.checkbox("🔍 Explain This Prediction"):
+    # TreeSHAP on the same encoded row as the prediction (see explanations.py), kept in its cache entry,
+    # or in an entry of its own until the prediction is made; peek() leaves the cache statistics alone
+    import engine
+    import explanations
+
+    cache_key = prediction_cache.feature_key(data, category_mappings, prediction_version, input_query)
+    explain_key = f"{cache_key}:contributions"
+    cached = prediction_cache.cache.peek(cache_key)
+    contributions = cached.get("contributions") if cached is not None else None
+    if contributions is None:
+        contributions = prediction_cache.cache.peek(explain_key)
+    if contributions is None:
+        contributions = explanations.explain_one(data, engine.get_spec("general"))
+        if cached is not None:
+            cached["contributions"] = contributions
         else:
-            msg, color = "Expected to Be a Key Player", "#008000"
-
-        rgba_bg = hex_to_rgba(color, alpha=0.6)  # 0.6 ist die Transparenz
-
-        with col_m:
-            st.markdown(f"""
-            <div style='
-                background-color: {rgba_bg};
-                height: 80px;
-                display: flex;
-                flex-direction: column;
-                justify-content: center;
-                border-radius: 12px;
-                text-align: center;
-                letter-spacing: 0.5px;
-                box-shadow: 0 4px 12px rgba(0,0,0,0.3);'>
-                <span style='color: white; font-size: 1.3rem; font-weight: 600;'>
-                    {msg} – Expected Playing Time: <strong>{final_pred[0]:.2f}%</strong>
-                </span>
-            </div>
-            """, unsafe_allow_html=True)
-            st.markdown("### 👥 Top 3 Similar Transfers")
-            for _, row in similar_players.iterrows():
-                st.markdown(f"- **{row['playerName']}** | Position: {row['mainPosition']} | Season: {row['season']} | Playing %: {row['percentage_played']}%")
-
-        
+            prediction_cache.cache.put(explain_key, contributions)
+
+    features = contributions.drop(explanations.BIAS)
+    top = features.reindex(features.abs().sort_values(ascending=False).index[:10])
+    st.caption(f"Contributions to the XGBoost output ({contributions.sum():.2f}) before the GAM calibration, "
+               f"starting from the average output of {contributions[explanations.BIAS]:.2f}")
+    st.bar_chart(top.rename("Contribution"), horizontal=True)
+    st.dataframe({"Feature": top.index, "Value": [str(data.get(name)) for name in top.index],
+                  "Contribution": top.round(3).to_numpy()}, use_container_width=True)
+
+# === Sensitivity Analysis ===
+if st.checkbox("🎚️ Sensitivity Analysis"):
+    # Each chart is one batched XGBoost + GAM call over a grid around the current inputs
+    import sensitivity
+
+    sweep_labels = {feature: label for feature, (label, _, _) in sensitivity.SWEEP_FEATURES.items()}
+
+    st.markdown("#### Response Curves")
+    curve_cols = st.columns(2)
+    for i, (feature, curve) in enumerate(sensitivity.response_curves(data).items()):
+        with curve_cols[i % 2]:
+            st.markdown(f"**{sweep_labels[feature]}**")
+            st.line_chart(curve)
+
+    st.markdown("#### Heatmap")
+    col_x, col_y = st.columns(2)
+    feature_x = col_x.selectbox("X Axis", list(sweep_labels), index=0, format_func=sweep_labels.get, key="sweep_x")
+    feature_y = col_y.selectbox("Y Axis", list(sweep_labels), index=1, format_func=sweep_labels.get, key="sweep_y")
+    if feature_x == feature_y:
+        st.info("Select two different features for the heatmap.")
+    else:
+        x_values, y_values, surface = sensitivity.response_surface(data, feature_x, feature_y)
+        st.pyplot(sensitivity.heatmap_figure(x_values, y_values, surface, feature_x, feature_y,
+                                             marker=(data[feature_x], data[feature_y])))
+
+# === Destination League Comparison ===
+if st.checkbox("🌍 Compare All Destination Leagues"):
+    # Every (area, level) pair is scored in one batched call; the selected destination is ignored here
+    import destinations
+
+    ranking = destinations.compare_destinations(data, category_mappings, area_to_levels)
+    st.markdown(f"#### Expected Playing Time in {len(ranking)} Destination Leagues")
+    st.dataframe(
+        ranking.rename(columns={
+            "to_competition_competition_area": "Area",
+            "to_competition_competition_level": "Level",
+            "foreign_transfer": "Foreign",
+            "expected_playing_percentage": "Expected Playing %",
+            "recommendation": "Recommendation",
+        }).style.format({"Expected Playing %": "{:.2f}"}),
+        use_container_width=True,
+    )
+
 if st.checkbox("Show feature vector"):
     st.write({k: v for k, v in data.items() if v != 0})
 
+if st.checkbox("⏱️ Show timing breakdown"):
+    st.markdown("#### This Run")
+    st.dataframe(run_trace, use_container_width=True)
+    st.caption(f"Total instrumented time: {sum(entry['ms'] for entry in run_trace):.1f} ms")
+    st.markdown("#### All Runs in This Process")
+    st.dataframe(metrics.summary(), use_container_width=True)
 
-# === Feature Importances ===
+if st.checkbox("Show loaded models"):
+    st.dataframe(model_registry.resident_models(), use_container_width=True)
+    cache_stats = prediction_cache.cache.stats()
+    st.caption(f"Prediction cache: {cache_stats['entries']} entries, {cache_stats['hits']} hits / "
+               f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)")
 
-import matplotlib.pyplot as plt
-import numpy as np
 
-with st.expander("📈 Show Feature Importances"):
-    fig, ax = plt.subplots()
-    importances = model.feature_importances_
-    indices = np.argsort(importances)[::-1][:10]  # top 10
-    features = np.array(model.feature_names_in_)[indices]
+# === Feature Importances ===
+
+if st.checkbox("📈 Show Feature Importances"):
+    # Chart and breakdown are computed once per model version (see feature_importance.py)
+    import feature_importance
 
-    ax.barh(features[::-1], importances[indices][::-1])
-    ax.set_title("Top 10 Feature Importances")
-    ax.set_xlabel("Importance")
-    st.pyplot(fig)
+    st.image(feature_importance.importance_chart("model2.json"))
+    st.dataframe(feature_importance.importance_table("model2.json"), use_container_width=True)
 
 # === Footer Section ===
 st.markdown("""
@@ -1,10 +1,7 @@
 import streamlit as st
-import pandas as pd
-import joblib
-import base64
-import json
-from pathlib import Path
-import xgboost as xgb
+import assets
+import lookup_tables
+import model_registry
 
 st.set_page_config(
     page_title="1.FC Köln Transfer Dashboard",
@@ -15,18 +12,18 @@ st.set_page_config(
 # Correct paths to images
 stadium_background = "stadium.jpg"
 logo_fc = "1-fc-koln-logo-png_seeklogo-266469.png"
-logo_uni = "Uni_blau.png"
+logo_uni = "Uni_blau2.png"
 
-# Apply full background styling via base64 with overlay
-def set_bg_image_with_overlay(image_path):
-    with open(image_path, "rb") as img_file:
-        img_base64 = base64.b64encode(img_file.read()).decode()
-    st.markdown(
-        f"""
+# Images are resized once into static/ and referenced by URL (see assets.py)
+STATIC_SERVING = st.get_option("server.enableStaticServing")
+
+@st.cache_data
+def background_css(image_url):
+    return f"""
         <style>
         .stApp {{
             background: linear-gradient(rgba(255,255,255,0.7), rgba(255,255,255,0.7)),
-                        url("data:image/png;base64,{img_base64}");
+                        url("{image_url}");
             background-size: cover;
             background-position: center;
             background-attachment: fixed;
@@ -48,9 +45,11 @@ def set_bg_image_with_overlay(image_path):
             font-weight: 600 !important;
         }}
         </style>
-        """,
-        unsafe_allow_html=True
-    )
+        """
+
+# Apply full background styling with overlay
+def set_bg_image_with_overlay(image_path):
+    st.markdown(background_css(assets.asset_url(image_path, STATIC_SERVING)), unsafe_allow_html=True)
 
 # Inject background with white transparency overlay
 set_bg_image_with_overlay(stadium_background)
@@ -58,11 +57,11 @@ set_bg_image_with_overlay(stadium_background)
 # Logos and title
 col_fc, col_title, col_uni = st.columns([1, 5, 1])
 with col_fc:
-    st.image(logo_fc, width=130)
+    st.image(assets.asset_path(logo_fc), width=130)
 with col_title:
     st.markdown("<h1 style='text-align: center;'>1. FC Köln Transfer Success Predictor with Attackers</h1>", unsafe_allow_html=True)
 with col_uni:
-    st.image(logo_uni, width=500)
+    st.image(assets.asset_path(logo_uni), width=500)
 
 st.markdown("""
 <p>
@@ -73,11 +72,13 @@ This tool, developed in cooperation with the University of Cologne, predicts the
 
 
 # === Load Model and Mappings ===
-model = xgb.XGBRegressor()
-model.load_model("model_attackers.json")
+# The same files as the "attacker" spec in engine.py, which is imported on the first prediction
+MODEL_PATH = "model_attackers.json"
+MAPPINGS_PATH = "category_mappings_attackers.json"
 
-with open("category_mappings_attackers.json") as f:
-    category_mappings = json.load(f)
+# Mappings and derived lookup tables are cached on disk and per process (see lookup_tables.py)
+lookups = lookup_tables.load_lookups("xgboost_predictions_test_attackers.csv", MAPPINGS_PATH)
+category_mappings = lookups["category_mappings"]
 
 valid_areas = category_mappings["from_competition_competition_area"]
 valid_to_areas = category_mappings["to_competition_competition_area"]
@@ -86,22 +87,11 @@ valid_main_positions = category_mappings["mainPosition"]
 valid_feet = category_mappings["foot"]
 valid_transfer_age = category_mappings["transfer_age_grouped"]
 valid_scorer_grouped = category_mappings["scorer_before_grouped"]
-valid_clean_sheets = category_mappings["clean_sheets_before_grouped_new"]
+valid_clean_sheets = category_mappings["clean_sheets_before_grouped"]
 
 # Dynamic mapping from real data
-position_group_to_main = pd.read_csv("xgboost_predictions_test_attackers.csv").groupby("positionGroup")["mainPosition"].unique().apply(list).to_dict()
-
-area_to_levels = {
-    'Austria': [1, 2], 'Belgium': [1, 2], 'Bosnia-Herzegovina': [1], 'Bulgaria': [1], 'Canada': [1],
-    'Croatia': [1, 2], 'Czech Republic': [1], 'Denmark': [1, 2], 'England': [1, 2, 3, 4], 'Estonia': [1],
-    'Finland': [1, 2], 'France': [1, 2, 3], 'Georgia': [1], 'Germany': [1, 2, 3, 4], 'Greece': [1],
-    'Hungary': [1], 'Ireland': [1], 'Israel': [1], 'Italy': [1, 2], 'Japan': [1], 'Korea, South': [1],
-    'Latvia': [1], 'Lithuania': [1], 'Luxembourg': [1], 'Malta': [1], 'Moldova': [1], 'Montenegro': [1],
-    'Netherlands': [1, 2], 'Northern Ireland': [1], 'Norway': [1, 2], 'Poland': [1], 'Portugal': [1, 2],
-    'Romania': [1], 'Russia': [1], 'Saudi Arabia': [1], 'Scotland': [1], 'Serbia': [1], 'Slovakia': [1],
-    'Slovenia': [1], 'Spain': [1, 2], 'Sweden': [1, 2], 'Switzerland': [1, 2], 'Türkiye': [1],
-    'Ukraine': [1], 'United States': [1, 2, 3], 'Wales': [1]
-}
+position_group_to_main = lookups["position_group_to_main"]
+area_to_levels = lookups["area_to_levels"]
 
 # === Inputs ===
 col1, col2 = st.columns(2)
@@ -130,7 +120,7 @@ with col2:
 foreign_transfer = int((from_area != to_area))
 
 # === Feature Vector ===
-data = {col: 0 for col in model.feature_names_in_}
+data = {col: 0 for col in model_registry.feature_names(MODEL_PATH)}
 data['height'] = height
 data['transfer_age_grouped'] = transfer_age_grouped
 data['isLoan'] = int(isLoan)
@@ -139,7 +129,7 @@ data['was_joker'] = bool(was_joker)
 data['foreign_transfer'] = foreign_transfer
 data['percentage_played_before'] = percentage_played_before
 data['scorer_before_grouped'] = scorer_before_grouped
-data['clean_sheets_before_grouped_new'] = clean_sheets_grouped
+data['clean_sheets_before_grouped'] = clean_sheets_grouped
 data['fromTeam_marketValue'] = from_team_market_value
 data['toTeam_marketValue'] = to_team_market_value
 data['marketvalue_closest'] = market_value
@@ -151,16 +141,12 @@ data['positionGroup'] = position_group
 data['from_competition_competition_area'] = from_area
 data['to_competition_competition_area'] = to_area
 
-input_df = pd.DataFrame([data])
-
-# Category typing
-for col, cats in category_mappings.items():
-    if col in input_df.columns:
-        input_df[col] = pd.Categorical(input_df[col], categories=cats)
-
 # === Prediction ===
 if st.button("Predict"):
-    pred = model.predict(input_df)[0]
+    # numpy/pandas/xgboost are imported on the first prediction, not at startup
+    import engine
+
+    pred = engine.get_spec("attacker").predict_one(data)
 
     if pred < 40:
         msg, color = "🚫 Not Recommended", "#FF4B4B"
@@ -185,3 +171,6 @@ if st.button("Predict"):
 
 if st.checkbox("Show feature vector"):
     st.write({k: v for k, v in data.items() if v != 0})
+
+with st.expander("🧠 Loaded Models"):
+    st.dataframe(model_registry.resident_models(), use_container_width=True)
@@ -0,0 +1,83 @@
+"""Static asset pipeline for the dashboards.
+
+The original images are several hundred KB to a few MB. They are resized and
+recompressed once into ``static/``, which Streamlit serves directly when
+``server.enableStaticServing`` is on (see ``.streamlit/config.toml``). The
+pages then reference them by URL, so the browser downloads and caches each
+image once instead of receiving a base64 data URI on every rerun. When
+static serving is off, the optimized image is inlined as a data URI that is
+encoded once per process.
+
+Run ``python assets.py`` after replacing a source image; the dashboards also
+refresh stale outputs on startup.
+"""
+import base64
+import os
+from functools import lru_cache
+
+STATIC_DIR = "static"
+STATIC_URL = "app/static"
+
+# source file -> (output name, max width in px, format)
+ASSETS = {
+    "stadium.jpg": ("stadium.jpg", 1920, "JPEG"),
+    "1-fc-koln-logo-png_seeklogo-266469.png": ("logo_fc.png", 180, "PNG"),
+    "Uni_blau2.png": ("logo_uni.png", 300, "PNG"),
+}
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png"}
+
+
+def _output_path(source):
+    return os.path.join(STATIC_DIR, ASSETS[source][0])
+
+
+def optimize_image(source):
+    """Write the resized/recompressed copy of ``source`` unless it is already up to date."""
+    name, max_width, fmt = ASSETS[source]
+    output = _output_path(source)
+    if os.path.exists(output) and os.path.getmtime(output) >= os.path.getmtime(source):
+        return output
+
+    from PIL import Image
+
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    with Image.open(source) as img:
+        if img.width > max_width:
+            img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+        if fmt == "JPEG":
+            img.convert("RGB").save(output, fmt, quality=70, optimize=True, progressive=True)
+        else:
+            img.save(output, fmt, optimize=True)
+    return output
+
+
+@lru_cache(maxsize=None)
+def build_static_assets():
+    """Refresh every optimized asset; runs once per process."""
+    return {source: optimize_image(source) for source in ASSETS}
+
+
+@lru_cache(maxsize=None)
+def _data_uri(source, mtime):
+    with open(optimize_image(source), "rb") as f:
+        encoded = base64.b64encode(f.read()).decode()
+    return f"data:{_MIME_TYPES[ASSETS[source][2]]};base64,{encoded}"
+
+
+def asset_url(source, static_serving=True):
+    """URL of the optimized copy of ``source`` for use in HTML/CSS."""
+    build_static_assets()
+    if static_serving:
+        return f"{STATIC_URL}/{ASSETS[source][0]}"
+    return _data_uri(source, os.path.getmtime(source))
+
+
+def asset_path(source):
+    """Local path of the optimized copy of ``source`` (e.g. for ``st.image``)."""
+    return build_static_assets()[source]
+
+
+if __name__ == "__main__":
+    for source, output in build_static_assets().items():
+        print(f"{source} ({os.path.getsize(source) // 1024} KB) -> {output} ({os.path.getsize(output) // 1024} KB)")
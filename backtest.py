@@ -0,0 +1,214 @@
+"""Backtest the current models against the held-out test sets.
+
+Re-scores ``xgboost_predictions_test.csv`` (general model) and
+``xgboost_predictions_test_attackers.csv`` (attacker model) in chunks,
+spread over worker processes, and reports:
+
+* error metrics against ``Actual`` (MAE, RMSE, bias, R²), overall and
+  sliced by position, destination league and destination level,
+* drift against the ``Predicted`` column stored with the test set,
+* coverage of the P10–P90 band (see intervals.py; ~0.8 when calibrated),
+  cross-fitted, since the band is fitted on these same test sets,
+* throughput in rows/sec.
+
+With ``--baseline`` the run is compared with a previous report and fails
+(exit status 1) if the overall MAE grew by more than ``--max-mae-increase``
+or the throughput fell below ``--min-throughput-ratio`` of the baseline.
+
+Usage:
+    python backtest.py --json backtest.json
+    python backtest.py --gam --workers 4 --baseline backtest.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import batch_score
+import engine
+import intervals
+
+# name -> (test set, engine spec)
+TEST_SETS = {
+    "general": ("xgboost_predictions_test.csv", "general"),
+    "attacker": ("xgboost_predictions_test_attackers.csv", "attacker"),
+}
+TARGET_COLUMNS = ["Actual", "Predicted", "Residual"]
+SLICES = {
+    "position": ["mainPosition"],
+    "league": ["to_competition_competition_area", "to_competition_competition_level"],
+    "level": ["to_competition_competition_level"],
+}
+DEFAULT_CHUNK_SIZE = 2_000
+
+
+def error_metrics(actual, predicted):
+    actual = np.asarray(actual, dtype=float)
+    predicted = np.asarray(predicted, dtype=float)
+    error = predicted - actual
+    total = ((actual - actual.mean()) ** 2).sum()
+    return {
+        "n": int(len(actual)),
+        "mae": round(float(np.abs(error).mean()), 4),
+        "rmse": round(float(np.sqrt((error ** 2).mean())), 4),
+        "bias": round(float(error.mean()), 4),
+        "r2": round(float(1 - (error ** 2).sum() / total), 4) if total > 0 else None,
+    }
+
+
+# === WORKERS ===
+
+def _init_worker(nthread):
+    # Each worker loads the models once; nthread keeps workers x threads within the cores
+    engine.warm()
+    for spec in engine.SPECS:
+        spec.model().get_booster().set_param({"nthread": nthread})
+
+
+def _score_chunk(spec_name, chunk, use_gam):
+    xgb_pred, final_pred, lower, upper = engine.get_spec(spec_name).predict_with_interval(
+        chunk.drop(columns=TARGET_COLUMNS, errors="ignore")
+    )
+    keep = sorted({col for cols in SLICES.values() for col in cols} | {"Actual", "Predicted"})
+    result = chunk[[col for col in keep if col in chunk.columns]].copy()
+    result["prediction"] = final_pred if use_gam else xgb_pred
+    result["expected_playing_percentage"] = final_pred
+    result["p10"], result["p90"] = lower, upper
+    return result
+
+
+def score_test_set(path, spec_name, use_gam=False, pool=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Re-score ``path`` chunk by chunk, in ``pool`` if given; returns ``(scored frame, seconds)``."""
+    chunks = batch_score.read_chunks(path, chunk_size)
+    start = time.perf_counter()
+    if pool is None:
+        parts = [_score_chunk(spec_name, chunk, use_gam) for chunk in chunks]
+    else:
+        parts = list(pool.map(_score_chunk, *zip(*((spec_name, chunk, use_gam) for chunk in chunks))))
+    scored = pd.concat(parts, ignore_index=True)
+    return scored, time.perf_counter() - start
+
+
+def _start_pool(workers):
+    nthread = max(1, (os.cpu_count() or 1) // workers)
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(nthread,))
+    # Start every worker (and load its models) before the clock runs
+    list(pool.map(time.sleep, [0.05] * workers))
+    return pool
+
+
+# === REPORT ===
+
+def evaluate(scored, seconds, stage):
+    valid = scored.dropna(subset=["Actual", "prediction"])
+    stored = valid.dropna(subset=["Predicted"])
+    drift = (stored["prediction"] - stored["Predicted"]).abs()
+    report = {
+        "rows": int(len(scored)),
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(len(scored) / seconds, 1) if seconds > 0 else None,
+        "stage": stage,
+        "overall": error_metrics(valid["Actual"], valid["prediction"]),
+        "stored_predictions": error_metrics(stored["Actual"], stored["Predicted"]),
+        "drift": {
+            "mean_abs": round(float(drift.mean()), 4),
+            "max_abs": round(float(drift.max()), 4),
+        },
+        # The band is fitted on this test set: in-sample coverage is ~0.8 by construction
+        "interval_coverage": round(intervals.cross_fitted_coverage(
+            valid["expected_playing_percentage"].to_numpy(), valid["Actual"].to_numpy()), 4),
+        "interval_coverage_in_sample": round(float(valid["Actual"].between(valid["p10"], valid["p90"]).mean()), 4),
+        "slices": {},
+    }
+    for name, columns in SLICES.items():
+        rows = []
+        for key, part in valid.groupby(columns, dropna=False, sort=True):
+            key = key if isinstance(key, tuple) else (key,)
+            rows.append({"slice": " ".join(str(value) for value in key),
+                         **error_metrics(part["Actual"], part["prediction"])})
+        report["slices"][name] = sorted(rows, key=lambda row: row["n"], reverse=True)
+    return report
+
+
+def run(names=tuple(TEST_SETS), use_gam=False, workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    stage = "gam" if use_gam else "xgboost"
+    results = {}
+    if workers > 1:
+        pool = _start_pool(workers)
+    else:
+        pool = None
+        engine.warm()
+    try:
+        for name in names:
+            path, spec_name = TEST_SETS[name]
+            scored, seconds = score_test_set(path, spec_name, use_gam, pool, chunk_size)
+            results[name] = evaluate(scored, seconds, stage)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    total_rows = sum(r["rows"] for r in results.values())
+    total_seconds = sum(r["seconds"] for r in results.values())
+    return {
+        "workers": workers,
+        "chunk_size": chunk_size,
+        "stage": stage,
+        "rows_per_sec": round(total_rows / total_seconds, 1) if total_seconds > 0 else None,
+        "test_sets": results,
+    }
+
+
+def gate(report, baseline, max_mae_increase=0.5, min_throughput_ratio=0.8):
+    """Reasons ``report`` should block a model upgrade compared with ``baseline``."""
+    failures = []
+    for name, result in report["test_sets"].items():
+        previous = baseline.get("test_sets", {}).get(name)
+        if previous is None:
+            continue
+        increase = result["overall"]["mae"] - previous["overall"]["mae"]
+        if increase > max_mae_increase:
+            failures.append(f"{name}: MAE {previous['overall']['mae']:.3f} -> {result['overall']['mae']:.3f}")
+    if baseline.get("rows_per_sec") and report["rows_per_sec"] < baseline["rows_per_sec"] * min_throughput_ratio:
+        failures.append(f"throughput {baseline['rows_per_sec']:.0f} -> {report['rows_per_sec']:.0f} rows/s")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the current models on the held-out test sets.")
+    parser.add_argument("--sets", nargs="+", choices=list(TEST_SETS), default=list(TEST_SETS))
+    parser.add_argument("--gam", action="store_true", help="evaluate the GAM-calibrated output where a model has one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="scoring processes")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per scoring task")
+    parser.add_argument("--baseline", help="previous --json report to gate against")
+    parser.add_argument("--max-mae-increase", type=float, default=0.5, help="allowed MAE increase (percentage points)")
+    parser.add_argument("--min-throughput-ratio", type=float, default=0.8, help="allowed fraction of baseline rows/sec")
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.sets, args.gam, args.workers, args.chunk_size)
+    for name, result in report["test_sets"].items():
+        overall, drift = result["overall"], result["drift"]
+        print(f"{name:9s} {result['rows']:6d} rows  MAE {overall['mae']:.3f}  RMSE {overall['rmse']:.3f}  "
+              f"bias {overall['bias']:+.3f}  (stored MAE {result['stored_predictions']['mae']:.3f}, "
+              f"drift {drift['mean_abs']:.3f})  P10-P90 coverage {result['interval_coverage']:.2f} (cross-fitted)  {result['rows_per_sec']:,.0f} rows/s")
+    print(f"total {report['rows_per_sec']:,.0f} rows/s with {report['workers']} worker(s), stage {report['stage']}")
+
+    failures = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = gate(report, json.load(f), args.max_mae_increase, args.min_throughput_ratio)
+        report["gate_failures"] = failures
+        for failure in failures:
+            print(f"GATE FAILED {failure}", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Headless batch scoring of transfer shortlists.
+
+Usage:
+    python batch_score.py candidates.csv -o scored.csv
+    python batch_score.py candidates.parquet -o scored.parquet --chunk-size 100000
+    python batch_score.py final_dataset.csv -o rescored.csv --workers 4 --nthread 1
+
+The input holds one candidate per row using the model's raw column names
+(``height``, ``transferAge``, ``marketvalue_closest``, ``fromTeam_marketValue``,
+``to_competition_competition_area`` ...). Rows are read, scored and written in
+chunks, so the whole file never has to fit in memory.
+
+With ``--workers N`` the chunks are scored in a pool of N processes, each
+loading the models once at start-up. At most two chunks per worker are in
+flight and results are written in input order as they complete.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+import intervals
+import model_registry
+import scoring
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most ``chunk_size`` rows from a CSV or Parquet file."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def text_columns(mappings_path=scoring.MAPPINGS_PATH):
+    """Categorical input columns of every model, written as strings whatever a chunk's values look like."""
+    import engine
+
+    columns = set(scoring.load_category_mappings(mappings_path))
+    for spec in engine.SPECS:
+        columns.update(spec.category_mappings)
+    return columns
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file as they arrive.
+
+    A Parquet file has one schema, but pandas infers dtypes per chunk (an
+    all-empty column is float in one chunk and text in the next, integers
+    turn float once a value is missing). The schema is therefore pinned on
+    the first chunk: ``text_columns`` and all-null object columns as
+    strings, integer columns as float64, and every later chunk is cast to it.
+    """
+
+    def __init__(self, path, text_columns=()):
+        self.path = Path(path)
+        self.text_columns = set(text_columns)
+        self._parquet_writer = None
+        self._schema = None
+        self._wrote_header = False
+
+    def _pinned_schema(self, schema):
+        import pyarrow as pa
+
+        fields = []
+        for field in schema:
+            if field.name in self.text_columns or pa.types.is_null(field.type):
+                field = field.with_type(pa.string())
+            elif pa.types.is_integer(field.type):
+                field = field.with_type(pa.float64())
+            fields.append(field)
+        return pa.schema(fields)
+
+    def write(self, df):
+        if self.path.suffix == ".parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+            if self._parquet_writer is None:
+                self._schema = self._pinned_schema(table.schema)
+                self._parquet_writer = pq.ParquetWriter(self.path, self._schema)
+            self._parquet_writer.write_table(table.select(self._schema.names).cast(self._schema))
+        else:
+            df.to_csv(self.path, mode="a" if self._wrote_header else "w", header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def chunk_scorer(model_path=scoring.MODEL_PATH, gam_path=scoring.GAM_PATH, mappings_path=scoring.MAPPINGS_PATH,
+                 route=False, calibration_path=intervals.CALIBRATION_PATH, explain=False, nthread=None):
+    """Load the models once and return a function scoring one chunk (see ``score_file``)."""
+    import engine
+
+    if route:
+        engine.warm()
+        specs = engine.SPECS
+        score = engine.score_frame
+    else:
+        specs = [engine.ModelSpec("general", model_path, mappings_path, gam_path, calibration_path=calibration_path)]
+        model = model_registry.load_xgb_model(model_path)
+        gam_model = model_registry.load_gam_model(gam_path)
+        category_mappings = scoring.load_category_mappings(mappings_path)
+        calibration = specs[0].calibration()
+
+        def score(chunk):
+            return scoring.score_frame(chunk, model, gam_model, category_mappings, calibration)
+
+    if nthread is not None:
+        for spec in specs:
+            spec.model().get_booster().set_param({"nthread": nthread})
+
+    def score_chunk(chunk):
+        if not explain:
+            return score(chunk)
+        import explanations
+
+        # One encoding per routed part feeds both the prediction and the TreeSHAP contributions
+        scored, explained = explanations.score_and_explain(chunk, specs)
+        if not route:
+            scored = scored.drop(columns="model")
+        scored["top_features"] = explanations.top_features(explained)
+        return pd.concat([scored, explained], axis=1)
+
+    return score_chunk
+
+
+# === WORKER POOL ===
+
+_worker_score = None
+
+
+def _init_worker(*scorer_args):
+    global _worker_score
+    _worker_score = chunk_scorer(*scorer_args)
+
+
+def _score_in_worker(chunk):
+    return _worker_score(chunk)
+
+
+def scored_chunks(chunks, scorer_args=(), workers=1):
+    """Yield ``chunks`` scored in order, in a pool of ``workers`` processes if more than one."""
+    if workers <= 1:
+        score_chunk = chunk_scorer(*scorer_args)
+        for chunk in chunks:
+            yield score_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=tuple(scorer_args)) as pool:
+        # Bounded read-ahead keeps memory flat; results are taken from the left to preserve input order
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_score_in_worker, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def score_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE,
+               model_path=scoring.MODEL_PATH, gam_path=scoring.GAM_PATH, mappings_path=scoring.MAPPINGS_PATH,
+               route=False, calibration_path=intervals.CALIBRATION_PATH, explain=False, workers=1, nthread=None):
+    """Score ``input_path`` chunk by chunk and stream the results to ``output_path``.
+
+    With ``route=True`` every row is scored by the model for its position
+    group (see engine.py) and the model files given here are ignored.
+    ``calibration_path`` is the test set whose residuals give the P10–P90
+    columns (see intervals.py); ``None`` leaves them out. With ``explain=True``
+    the per-feature TreeSHAP contributions (``contrib_<feature>``, see
+    explanations.py) and the three strongest ones (``top_features``) are
+    appended to every row.
+
+    ``workers`` > 1 scores the chunks in that many processes; ``nthread`` is
+    the XGBoost thread count per process (default: the cores divided among
+    the workers, or all cores with one worker).
+    Returns the number of rows scored.
+    """
+    if nthread is None and workers > 1:
+        nthread = max(1, (os.cpu_count() or 1) // workers)
+    scorer_args = (model_path, gam_path, mappings_path, route, calibration_path, explain, nthread)
+
+    writer = ChunkWriter(output_path, text_columns(mappings_path))
+    n_rows = 0
+    try:
+        for scored in scored_chunks(read_chunks(input_path, chunk_size), scorer_args, workers):
+            writer.write(scored)
+            n_rows += len(scored)
+    finally:
+        writer.close()
+    return n_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet shortlist of transfer candidates.")
+    parser.add_argument("input", help="CSV or Parquet file with one candidate per row")
+    parser.add_argument("-o", "--output", required=True, help="destination .csv or .parquet file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows scored per predict call")
+    parser.add_argument("--model", default=scoring.MODEL_PATH, help="XGBoost model file")
+    parser.add_argument("--gam", default=scoring.GAM_PATH, help="pickled GAM metamodel")
+    parser.add_argument("--mappings", default=scoring.MAPPINGS_PATH, help="category mappings JSON")
+    parser.add_argument("--calibration", default=intervals.CALIBRATION_PATH,
+                        help="held-out test set (with Actual) the P10-P90 band is calibrated on")
+    parser.add_argument("--explain", action="store_true",
+                        help="append per-feature TreeSHAP contributions and the top three features")
+    parser.add_argument("--route", action="store_true",
+                        help="score each row with the model for its position group (attacker model for attackers)")
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes")
+    parser.add_argument("--nthread", type=int, help="XGBoost threads per process (default: cores / workers)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    n_rows = score_file(args.input, args.output, args.chunk_size, args.model, args.gam, args.mappings, args.route,
+                        args.calibration, args.explain, args.workers, args.nthread)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {n_rows} rows in {elapsed:.2f}s ({n_rows / max(elapsed, 1e-9):,.0f} rows/s) -> {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Recall and latency of the approximate (IVF) similarity search against the exact scan.
+
+All synthetic transfers are placed in one partition (one position, one
+level pair), the worst case for the exact scan, which has to look at every
+row. For each ``nprobe`` the script reports recall@k (the share of the exact
+top-k that the approximate search also returns) and query latency
+percentiles.
+
+Usage (from the repository root):
+    python benchmarks/ann_recall.py
+    python benchmarks/ann_recall.py --rows 2000000 --top-n 10 --nprobe 1 4 16 64 --json ann.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+PARTITION = {"mainPosition": "centerforward", "from_competition_competition_level": 1.0,
+             "to_competition_competition_level": 1.0}
+
+
+def _single_partition(df):
+    return df.assign(**PARTITION)
+
+
+def measure(index, queries, top_n, nprobe):
+    results, samples = [], []
+    for query in queries:
+        start = time.perf_counter()
+        found = index.query(query, top_n, nprobe)
+        samples.append((time.perf_counter() - start) * 1000)
+        results.append(found.index.to_numpy())
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return results, {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic transfers in the partition")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--nprobe", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    import similarity_index
+    import synthetic
+
+    source = synthetic._source()
+    reference = _single_partition(synthetic.reference_set(args.rows, seed=7, source=source))
+    # Complete rows only, like the dashboard's inputs (missing features make every distance NaN)
+    queries = similarity_index.prepare_reference(
+        _single_partition(synthetic.reference_set(args.queries * 2, seed=8, source=source))
+    ).head(args.queries).to_dict(orient="records")
+
+    index = similarity_index.SimilarityIndex(ann_min_rows=0)
+    start = time.perf_counter()
+    index.update(reference)
+    build_s = time.perf_counter() - start
+    del reference
+    part = next(iter(index.partitions.values()))
+    print(f"{len(part['matrix'])} rows x {part['matrix'].shape[1]} columns, "
+          f"{len(part['ivf']['centroids'])} cells, built in {build_s:.1f}s")
+
+    exact, exact_latency = measure(index, queries, args.top_n, None)
+    report = {"rows": len(part["matrix"]), "cells": len(part["ivf"]["centroids"]), "build_s": round(build_s, 2),
+              "top_n": args.top_n, "exact": exact_latency, "ann": {}}
+    print(f"{'search':>10s} {'recall':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    print(f"{'exact':>10s} {1.0:8.3f} {exact_latency['p50_ms']:9.3f} {exact_latency['p95_ms']:9.3f} "
+          f"{exact_latency['p99_ms']:9.3f}")
+    for nprobe in args.nprobe:
+        found, latency = measure(index, queries, args.top_n, nprobe)
+        recall = np.mean([len(np.intersect1d(a, e)) / len(e) for a, e in zip(found, exact) if len(e)])
+        report["ann"][nprobe] = {"recall": round(float(recall), 4), **latency}
+        print(f"{'nprobe=' + str(nprobe):>10s} {recall:8.3f} {latency['p50_ms']:9.3f} {latency['p95_ms']:9.3f} "
+              f"{latency['p99_ms']:9.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Scaling of the multi-process batch scorer with the number of workers.
+
+Writes a synthetic candidate file, scores it with ``batch_score.score_file``
+once per worker count (one XGBoost thread per worker by default) and reports
+throughput, speedup over the first (smallest) worker count and parallel
+efficiency. Every run's output is compared byte for byte with the first
+run's, so the pool must return the rows in input order. Timings include
+starting the pool and loading the models in each worker, as in a real job.
+
+Usage (from the repository root):
+    python benchmarks/batch_scaling.py
+    python benchmarks/batch_scaling.py --rows 1000000 --workers 1 2 4 8 --route --json scaling.json
+"""
+import argparse
+import filecmp
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _default_workers():
+    cores = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000, help="synthetic candidates to score")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="rows per shard")
+    parser.add_argument("--workers", nargs="+", type=int, default=_default_workers(),
+                        help="worker counts to run, smallest first (default: powers of two up to the cores)")
+    parser.add_argument("--nthread", type=int, default=1, help="XGBoost threads per worker")
+    parser.add_argument("--route", action="store_true", help="score through the position-group router")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    import batch_score
+    import synthetic
+
+    report = {"rows": args.rows, "chunk_size": args.chunk_size, "nthread": args.nthread,
+              "cores": os.cpu_count(), "runs": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "candidates.csv")
+        synthetic.candidates(args.rows, seed=3).to_csv(input_path, index=False)
+
+        reference_path = None
+        print(f"{'workers':>7s} {'seconds':>8s} {'rows/s':>10s} {'speedup':>8s} {'efficiency':>10s}")
+        for workers in args.workers:
+            output_path = os.path.join(tmp, f"scored_{workers}.csv")
+            start = time.perf_counter()
+            batch_score.score_file(input_path, output_path, args.chunk_size, route=args.route,
+                                   workers=workers, nthread=args.nthread)
+            seconds = time.perf_counter() - start
+
+            if reference_path is None:
+                reference_path, base_seconds, base_workers = output_path, seconds, workers
+            elif not filecmp.cmp(reference_path, output_path, shallow=False):
+                raise AssertionError(f"output with {workers} workers differs from the first run")
+            speedup = base_seconds / seconds
+            efficiency = speedup * base_workers / workers
+            run = {"workers": workers, "seconds": round(seconds, 3), "rows_per_sec": round(args.rows / seconds, 1),
+                   "speedup": round(speedup, 2), "efficiency": round(efficiency, 2)}
+            report["runs"].append(run)
+            print(f"{workers:7d} {seconds:8.2f} {run['rows_per_sec']:10,.0f} {speedup:8.2f} {run['efficiency']:10.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
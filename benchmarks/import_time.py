@@ -0,0 +1,76 @@
+"""Import-time budget for the dashboard's cold start.
+
+Runs ``python -X importtime`` on the modules ``app_final.py`` imports at
+startup, prints the slowest top-level imports and fails if the total exceeds
+the budget or if one of the heavy libraries that should only load on demand
+(xgboost, pandas, matplotlib, ...) is pulled in at startup.
+
+Usage (from the repository root):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget-ms 600 --json import_time.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+STARTUP_MODULES = ["streamlit", "assets", "lookup_tables", "metrics", "model_registry", "prediction_cache"]
+LAZY_MODULES = ["xgboost", "sklearn", "scipy", "matplotlib", "pygam", "pandas", "pyarrow", "joblib"]
+DEFAULT_BUDGET_MS = 800.0
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(modules=STARTUP_MODULES):
+    """Return ``{module: (self_us, cumulative_us, depth)}`` for one cold import of ``modules``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        timings[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return timings
+
+
+def report(timings, budget_ms=DEFAULT_BUDGET_MS, top=15):
+    total_ms = sum(self_us for self_us, _, _ in timings.values()) / 1000
+    top_level = sorted(
+        ((name, cumulative / 1000) for name, (_, cumulative, depth) in timings.items() if depth == 0),
+        key=lambda item: item[1], reverse=True,
+    )
+    eager = sorted(name for name in timings if name.split(".")[0] in LAZY_MODULES and "." not in name)
+    return {
+        "total_ms": round(total_ms, 1),
+        "budget_ms": budget_ms,
+        "slowest_imports_ms": {name: round(ms, 1) for name, ms in top_level[:top]},
+        "eager_heavy_imports": eager,
+        "passed": total_ms <= budget_ms and not eager,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    result = report(measure(), args.budget_ms)
+    print(f"startup imports: {result['total_ms']:.1f} ms (budget {result['budget_ms']:.0f} ms)")
+    for name, ms in result["slowest_imports_ms"].items():
+        print(f"  {ms:8.1f} ms  {name}")
+    if result["eager_heavy_imports"]:
+        print(f"heavy modules imported at startup: {', '.join(result['eager_heavy_imports'])}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    sys.exit(0 if result["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
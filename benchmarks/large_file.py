@@ -0,0 +1,105 @@
+"""Run the streaming pipeline on a candidate file larger than the machine's RAM.
+
+Writes a CSV of ``--size-mb`` (default: 10% more than the physical memory)
+by repeating a block of synthetic candidates, streams it through
+``pipeline.py`` in a subprocess and checks that every row was scored while
+the subprocess's peak resident memory stayed below ``--max-rss-mb``. Exits
+with status 1 otherwise. The generated files are deleted unless ``--keep``
+is given; they need about twice ``--size-mb`` of free disk.
+
+Usage (from the repository root):
+    python benchmarks/large_file.py
+    python benchmarks/large_file.py --size-mb 2000 --max-rss-mb 1024 --dir /data/tmp
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BLOCK_ROWS = 50_000
+
+
+def physical_memory_mb():
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20
+
+
+def write_candidates(path, size_mb):
+    """Write at least ``size_mb`` of candidate rows to ``path``; returns the number of rows."""
+    import synthetic
+
+    block = synthetic.candidates(BLOCK_ROWS, seed=5).to_csv(index=False)
+    header, body = block.split("\n", 1)
+    n_rows = 0
+    with open(path, "w") as f:
+        f.write(header + "\n")
+        while f.tell() < size_mb * 2**20:
+            f.write(body)
+            n_rows += BLOCK_ROWS
+    return n_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=round(physical_memory_mb() * 1.1), help="input file size")
+    parser.add_argument("--max-rss-mb", type=float, default=1536, help="allowed peak resident memory")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per pipeline chunk")
+    parser.add_argument("--dir", default=tempfile.gettempdir(), help="where to write the input and output files")
+    parser.add_argument("--keep", action="store_true", help="keep the generated files")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    input_path = os.path.join(args.dir, "large_candidates.csv")
+    output_path = os.path.join(args.dir, "large_candidates_scored.csv")
+    stats_path = os.path.join(args.dir, "large_candidates_stats.json")
+    try:
+        start = time.perf_counter()
+        n_rows = write_candidates(input_path, args.size_mb)
+        input_mb = os.path.getsize(input_path) / 2**20
+        print(f"wrote {n_rows:,} rows ({input_mb:,.0f} MB, RAM {physical_memory_mb():,.0f} MB) "
+              f"in {time.perf_counter() - start:.0f}s")
+
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "pipeline.py", input_path, "-o", output_path,
+                        "--chunk-size", str(args.chunk_size), "--stats-json", stats_path], check=True)
+        seconds = time.perf_counter() - start
+        # ru_maxrss is in KiB on Linux
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        with open(stats_path) as f:
+            stats = json.load(f)
+    finally:
+        if not args.keep:
+            for path in (input_path, output_path, stats_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    report = {"input_mb": round(input_mb, 1), "ram_mb": round(physical_memory_mb(), 1), "rows": n_rows,
+              "rows_scored": stats["rows"], "seconds": round(seconds, 1),
+              "rows_per_sec": round(stats["rows"] / seconds, 1), "peak_rss_mb": round(peak_rss_mb, 1),
+              "max_rss_mb": args.max_rss_mb}
+    print(f"scored {stats['rows']:,} rows in {seconds:.0f}s ({report['rows_per_sec']:,.0f} rows/s), "
+          f"peak RSS {peak_rss_mb:,.0f} MB (limit {args.max_rss_mb:,.0f} MB)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    if stats["rows"] != n_rows:
+        failures.append(f"scored {stats['rows']} of {n_rows} rows")
+    if peak_rss_mb > args.max_rss_mb:
+        failures.append(f"peak RSS {peak_rss_mb:.0f} MB above {args.max_rss_mb:.0f} MB")
+    for failure in failures:
+        print(f"FAILED {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Reproducible latency benchmarks for the prediction stack.
+
+Covers model loading (``XGBRegressor.load_model``, ``joblib.load`` of the
+GAM, the compiled GAM table), single-row and batched predictions, the GAM
+transform, single-row and batched TreeSHAP explanations, building and querying the similarity index over synthetic
+reference sets, and the full rerun of the Streamlit dashboard under
+``streamlit.testing``. Every case reports p50/p95/p99 in milliseconds.
+
+Results are written as JSON. Given a previous run as ``--baseline``, a case
+fails when its p50 or p95 exceeds the baseline by more than ``--threshold``
+(a ratio, 1.3 = 30% slower), and the exit status is 1.
+
+Usage (from the repository root):
+    python benchmarks/perf_suite.py --json perf.json
+    python benchmarks/perf_suite.py --baseline perf.json --json perf_new.json
+    python benchmarks/perf_suite.py --only similarity --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_THRESHOLD = 1.3
+BATCH_ROWS = 10_000
+
+
+def timings(fn, repeat, warmup=1):
+    """Wall-clock milliseconds of ``repeat`` calls of ``fn`` after ``warmup`` untimed calls."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples, **extra):
+    samples = np.asarray(samples)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        "n": len(samples),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(samples.mean()), 3),
+        **extra,
+    }
+
+
+# === MODEL LOADING ===
+
+def bench_load(repeat):
+    import joblib
+    import xgboost as xgb
+
+    import gam_export
+    import scoring
+
+    def load_xgb():
+        xgb.XGBRegressor().load_model(scoring.MODEL_PATH)
+
+    return {
+        "load.xgboost_model": summarize(timings(load_xgb, repeat)),
+        "load.gam_joblib": summarize(timings(lambda: joblib.load(scoring.GAM_PATH), repeat)),
+        "load.gam_compiled": summarize(timings(lambda: gam_export.load_compiled(scoring.GAM_PATH), repeat)),
+    }
+
+
+# === PREDICTION ===
+
+def bench_predict(repeat):
+    import joblib
+
+    import engine
+    import model_registry
+    import scoring
+    import synthetic
+
+    spec = engine.get_spec("general")
+    spec.warm()
+    model = spec.model()
+    rows = synthetic.candidates(BATCH_ROWS, seed=1)
+    single = rows.iloc[[0]]
+    profile = scoring.engineer_features(single).iloc[0].to_dict()
+
+    model_input = scoring.build_model_input(rows, spec.feature_names, spec.category_mappings)
+    xgb_pred = model.predict(model_input).reshape(-1, 1)
+    pygam = joblib.load(scoring.GAM_PATH)
+    compiled = model_registry.load_gam_model(scoring.GAM_PATH)
+
+    return {
+        "predict.single_fast_path": summarize(timings(lambda: spec.predict_one(profile), repeat * 20)),
+        "predict.single_dataframe": summarize(timings(lambda: scoring.score_frame(single), repeat * 5)),
+        "predict.batch_xgboost": summarize(timings(lambda: model.predict(model_input), repeat), rows=BATCH_ROWS),
+        "predict.batch_score_frame": summarize(timings(lambda: scoring.score_frame(rows), repeat), rows=BATCH_ROWS),
+        "gam.pygam": summarize(timings(lambda: pygam.predict(xgb_pred), repeat), rows=BATCH_ROWS),
+        "gam.compiled": summarize(timings(lambda: compiled.predict(xgb_pred), repeat), rows=BATCH_ROWS),
+    }
+
+
+# === EXPLANATIONS ===
+
+def bench_explain(repeat):
+    import engine
+    import explanations
+    import scoring
+    import synthetic
+
+    spec = engine.get_spec("general")
+    spec.warm()
+    rows = synthetic.candidates(BATCH_ROWS, seed=1)
+    profile = scoring.engineer_features(rows.iloc[[0]]).iloc[0].to_dict()
+
+    # TreeSHAP over 10k rows takes seconds per core, so the batch case runs a few times only
+    batch = timings(lambda: explanations.contributions(rows, spec), min(repeat, 3), warmup=0)
+    return {
+        "explain.single": summarize(timings(lambda: explanations.explain_one(profile, spec), repeat * 5)),
+        "explain.batch": summarize(batch, rows=BATCH_ROWS, cores=os.cpu_count(),
+                                   rows_per_sec=round(BATCH_ROWS / (np.median(batch) / 1000), 1)),
+    }
+
+
+# === SIMILARITY SEARCH ===
+
+def bench_similarity(repeat, sizes):
+    import similarity_index
+    import synthetic
+
+    source = synthetic._source()
+    queries = synthetic.reference_set(200, seed=99, source=source).to_dict(orient="records")
+    results = {}
+    for size in sizes:
+        reference = synthetic.reference_set(size, seed=size, source=source)
+        index = similarity_index.SimilarityIndex()
+        start = time.perf_counter()
+        index.update(reference)
+        build_ms = (time.perf_counter() - start) * 1000
+        del reference
+
+        it = iter(queries * (repeat * 10 // len(queries) + 2))
+        samples = timings(lambda: index.query(next(it)), repeat * 10, warmup=5)
+        results[f"similarity.query_{size}"] = summarize(samples, rows=size, build_ms=round(build_ms, 1))
+    return results
+
+
+# === STREAMLIT RERUN ===
+
+def bench_streamlit(repeat, script="app_final.py"):
+    import streamlit.logger
+    from streamlit.testing.v1 import AppTest
+
+    import prediction_cache
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=300)
+    start = time.perf_counter()
+    at.run()
+    first_ms = (time.perf_counter() - start) * 1000
+    # The dashboard's empty widget labels log a warning with a stack trace on every run;
+    # AppTest resets logging during its first run, so this only takes effect afterwards
+    streamlit.logger.set_log_level("error")
+    if at.exception:
+        raise RuntimeError(f"{script} raised: {at.exception[0].value}")
+
+    def predict():
+        prediction_cache.cache.clear()
+        at.button[0].click().run()
+
+    return {
+        "streamlit.first_run": summarize([first_ms]),
+        "streamlit.rerun": summarize(timings(at.run, repeat)),
+        "streamlit.predict_uncached": summarize(timings(predict, repeat)),
+        "streamlit.predict_cached": summarize(timings(lambda: at.button[0].click().run(), repeat)),
+    }
+
+
+SUITES = ["load", "predict", "explain", "similarity", "streamlit"]
+
+
+def run(suites=SUITES, repeat=20, sizes=DEFAULT_SIZES):
+    os.chdir(ROOT)
+    results = {}
+    if "load" in suites:
+        results.update(bench_load(repeat))
+    if "predict" in suites:
+        results.update(bench_predict(repeat))
+    if "explain" in suites:
+        results.update(bench_explain(repeat))
+    if "similarity" in suites:
+        results.update(bench_similarity(repeat, sizes))
+    if "streamlit" in suites:
+        results.update(bench_streamlit(repeat))
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Cases whose p50 or p95 is more than ``threshold`` times the baseline."""
+    regressions = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratios = {
+            stat: current[stat] / previous[stat]
+            for stat in ("p50_ms", "p95_ms")
+            if previous.get(stat)
+        }
+        if any(ratio > threshold for ratio in ratios.values()):
+            regressions[name] = {stat: round(ratio, 2) for stat, ratio in ratios.items()}
+    return regressions
+
+
+def environment():
+    import pandas as pd
+    import xgboost as xgb
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "xgboost": xgb.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=SUITES, default=SUITES, help="suites to run")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per case (single-row cases run more)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="synthetic reference set sizes")
+    parser.add_argument("--baseline", help="previous --json output to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed p50/p95 ratio to the baseline before a case counts as a regression")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.only, args.repeat, args.sizes)
+    report = {"environment": environment(), "repeat": args.repeat, "results": results}
+
+    print(f"{'case':34s} {'p50 ms':>10s} {'p95 ms':>10s} {'p99 ms':>10s}")
+    for name, stats in results.items():
+        print(f"{name:34s} {stats['p50_ms']:10.3f} {stats['p95_ms']:10.3f} {stats['p99_ms']:10.3f}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        report["regressions"] = compare(results, baseline, args.threshold)
+        for name, ratios in report["regressions"].items():
+            print(f"REGRESSION {name}: " + ", ".join(f"{stat} x{ratio}" for stat, ratio in ratios.items()))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if report.get("regressions") else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Synthetic candidate and reference sets for the benchmarks.
+
+Rows are bootstrapped from ``xgboost_predictions_test.csv`` so categories,
+levels and value ranges stay realistic, then numeric columns are jittered
+so that large sets are not just repeated rows. Generation is seeded and
+reproducible.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_PATH = os.path.join(ROOT, "xgboost_predictions_test.csv")
+
+JITTER_COLUMNS = {
+    "height": (0.01, 150, 220),
+    "transferAge": (0.05, 16, 40),
+    "marketvalue_closest": (0.20, 0, None),
+    "fromTeam_marketValue": (0.20, 0, None),
+    "toTeam_marketValue": (0.20, 0, None),
+    "percentage_played_before": (0.10, 0, 100),
+}
+_ENGINEERED = ["value_per_age", "value_age_product", "team_market_value_relation", "foreign_transfer"]
+_TARGETS = ["Actual", "Predicted", "Residual"]
+
+
+def _source():
+    return pd.read_csv(SOURCE_PATH)
+
+
+def candidates(n, seed=0, source=None):
+    """``n`` raw candidate rows (engineered columns dropped, as a scout would enter them)."""
+    source = _source() if source is None else source
+    rng = np.random.default_rng(seed)
+    df = source.iloc[rng.integers(0, len(source), n)].reset_index(drop=True)
+    for col, (scale, lower, upper) in JITTER_COLUMNS.items():
+        if col in df.columns:
+            df[col] = (df[col] * rng.normal(1.0, scale, n)).clip(lower, upper)
+    return df.drop(columns=[c for c in _ENGINEERED + _TARGETS if c in df.columns])
+
+
+def reference_set(n, seed=0, source=None):
+    """``n`` historical transfers with the columns ``final_dataset.csv`` provides."""
+    source = _source() if source is None else source
+    df = candidates(n, seed, source)
+    rng = np.random.default_rng(seed + 1)
+    to_value, from_value = df["toTeam_marketValue"], df["fromTeam_marketValue"]
+    df["team_market_value_relation"] = (to_value / from_value).where(from_value > 0, 0)
+    df["playerId"] = np.arange(n)
+    df["playerName"] = "Player " + df["playerId"].astype(str)
+    df["season"] = rng.integers(2010, 2024, n)
+    df["percentage_played"] = rng.uniform(0, 100, n).round(2)
+    return df
@@ -0,0 +1,54 @@
+"""Score one player profile against every destination league at once.
+
+The dashboard answers "how much would this player play at ``to_area`` /
+``to_level``?" for a single pair. Here the profile is expanded across every
+valid (``to_competition_competition_area``, level) combination, i.e. every
+area in ``category_mappings.json`` that has known levels in the lookup
+tables, and the whole grid is scored in one XGBoost + GAM call.
+``foreign_transfer`` and ``team_market_value_relation`` are recomputed per
+row by ``scoring.engineer_features``.
+"""
+import scoring
+
+RESULT_COLUMNS = [
+    "to_competition_competition_area",
+    "to_competition_competition_level",
+    "foreign_transfer",
+    "expected_playing_percentage",
+    "recommendation",
+]
+
+
+def destination_pairs(category_mappings, area_to_levels):
+    """Every (area, level) destination the model and the lookup tables both know."""
+    return [
+        (area, level)
+        for area in category_mappings["to_competition_competition_area"]
+        for level in area_to_levels.get(area, [])
+    ]
+
+
+def compare_destinations(profile, category_mappings, area_to_levels, top_n=None):
+    """Rank all destinations for ``profile`` by expected playing percentage.
+
+    Returns a DataFrame with ``RESULT_COLUMNS``, best destination first and a
+    1-based ``rank`` index.
+    """
+    pairs = destination_pairs(category_mappings, area_to_levels)
+    if not pairs:
+        raise ValueError("No destination leagues with known levels")
+    areas, levels = zip(*pairs)
+    grid = scoring.profile_grid(profile, {
+        "to_competition_competition_area": list(areas),
+        "to_competition_competition_level": list(levels),
+    })
+    scored = scoring.score_frame(grid, category_mappings=category_mappings)
+    scored["foreign_transfer"] = (
+        scored["from_competition_competition_area"] != scored["to_competition_competition_area"]
+    ).astype(int)
+    ranked = scored.sort_values("expected_playing_percentage", ascending=False, kind="stable")[RESULT_COLUMNS]
+    if top_n is not None:
+        ranked = ranked.head(top_n)
+    ranked.index = range(1, len(ranked) + 1)
+    ranked.index.name = "rank"
+    return ranked
@@ -0,0 +1,247 @@
+"""Shared scoring engine that routes each candidate to the model for its position group.
+
+The general model (``model2.json`` + GAM metamodel, continuous
+``transferAge``) and the attacker model (``model_attackers.json``, grouped
+age/scorer/clean-sheet bins, no metamodel) used to carry their own copy of
+the load/encode/predict stack. Here each model is described by a
+``ModelSpec`` declaring its files; the feature schema and the categorical
+mappings are read from those files. Models load once through
+``model_registry`` and single-row encoders are shared through
+``fast_encoder``, so both dashboards and the batch tools hit the same warm
+caches.
+
+``score_frame`` splits a mixed batch by ``positionGroup``, scores every
+sub-batch with one vectorized predict and returns the rows in their original
+order together with the name of the model that scored them, the expected
+playing percentage and its P10–P90 band (see intervals.py).
+"""
+import numpy as np
+import pandas as pd
+
+import intervals
+import metrics
+import model_registry
+import scoring
+
+# Attacker-model bins; the general dashboard's inputs are translated to the nearest bin
+TRANSFER_AGE_BINS = [-np.inf, 18, 22, 26, 30, 34, 38, np.inf]
+TRANSFER_AGE_LABELS = ["<18", "18-22", "22-26", "26-30", "30-34", "34-38", "38+"]
+_SCORER_TO_ATTACKER = {
+    "defender/goalkeeper": "0-3", "0-3": "0-3", "4-6": "3-6", "7-10": "6-10",
+    "11-15": "10-15", "16-20": "15-20", "21-30": "20-30", "30+": "30-40",
+}
+_CLEAN_SHEETS_TO_ATTACKER = {"0-1": "0-2", "2-4": "2-5", "5-9": "5-10", "10-14": "10-15", "15+": "15-20"}
+
+
+def attacker_features(df):
+    """Fill the attacker model's grouped columns from general-schema inputs where they are missing."""
+    df = df.copy()
+    if "transfer_age_grouped" not in df.columns and "transferAge" in df.columns:
+        df["transfer_age_grouped"] = pd.cut(
+            df["transferAge"], TRANSFER_AGE_BINS, right=False, labels=TRANSFER_AGE_LABELS
+        ).astype(object)
+    if "scorer_before_grouped" not in df.columns and "scorer_before_grouped_category" in df.columns:
+        df["scorer_before_grouped"] = df["scorer_before_grouped_category"].map(_SCORER_TO_ATTACKER)
+    if "clean_sheets_before_grouped" in df.columns:
+        df["clean_sheets_before_grouped"] = df["clean_sheets_before_grouped"].replace(_CLEAN_SHEETS_TO_ATTACKER)
+    return df
+
+
+class ModelSpec:
+    """One scoring model: its files, the position groups it serves and its input preparation.
+
+    ``position_groups=None`` marks the fallback model for every group no
+    other spec claims.
+    """
+
+    def __init__(self, name, model_path, mappings_path, gam_path=None, position_groups=None, prepare=None,
+                 calibration_path=None):
+        self.name = name
+        self.model_path = model_path
+        self.mappings_path = mappings_path
+        self.gam_path = gam_path
+        self.calibration_path = calibration_path
+        self.position_groups = tuple(position_groups) if position_groups is not None else None
+        self.prepare = prepare
+
+    def __repr__(self):
+        return f"ModelSpec({self.name!r}, {self.model_path!r})"
+
+    @property
+    def feature_names(self):
+        return model_registry.feature_names(self.model_path)
+
+    @property
+    def category_mappings(self):
+        return scoring.load_category_mappings(self.mappings_path)
+
+    def model(self):
+        return model_registry.load_xgb_model(self.model_path)
+
+    def gam(self):
+        return model_registry.load_gam_model(self.gam_path) if self.gam_path else None
+
+    def calibration(self):
+        """Residual calibration of this model's expected playing percentage (see intervals.py)."""
+        if not self.calibration_path:
+            return None
+        version = "|".join(model_registry.model_version(path) for path in (self.model_path, self.gam_path) if path)
+        return intervals.load_calibration(self.calibration_path, self._calibration_predict, version)
+
+    def _calibration_predict(self, df):
+        return self.predict(df)[1]
+
+    def warm(self):
+        """Load the model (and metamodel) into the registry."""
+        self.model()
+        self.gam()
+        self.calibration()
+
+    def interval(self, final_pred):
+        """``(p10, p90)`` arrays around expected playing percentages; NaN without a calibration."""
+        calibration = self.calibration()
+        if calibration is None:
+            return np.full(len(final_pred), np.nan), np.full(len(final_pred), np.nan)
+        return calibration.interval(final_pred)
+
+    def encode(self, df):
+        """Model input for ``df``: this model's schema, column order and categorical typing."""
+        if self.prepare is not None:
+            df = self.prepare(df)
+        return scoring.build_model_input(df, self.feature_names, self.category_mappings)
+
+    def predict(self, df):
+        """Vectorized ``(xgb_prediction, expected_playing_percentage)`` for every row of ``df``."""
+        return self.predict_encoded(self.encode(df))
+
+    def predict_encoded(self, model_input):
+        """``predict`` for a frame already returned by ``encode``."""
+        xgb_pred = self.model().predict(model_input)
+        gam = self.gam()
+        final_pred = gam.predict(xgb_pred.reshape(-1, 1)) if gam is not None else xgb_pred
+        return xgb_pred, final_pred
+
+    def predict_with_interval(self, df):
+        """``(xgb_prediction, expected_playing_percentage, p10, p90)``; the features are encoded once."""
+        xgb_pred, final_pred = self.predict(df)
+        return (xgb_pred, final_pred, *self.interval(final_pred))
+
+    def _predict_one(self, data):
+        import fast_encoder
+
+        model = self.model()
+        with metrics.span("xgboost"):
+            xgb_pred = fast_encoder.get_encoder(model, self.category_mappings).predict(data)
+        gam = self.gam()
+        if gam is None:
+            return xgb_pred, xgb_pred
+        with metrics.span("gam"):
+            return xgb_pred, gam.predict(xgb_pred.reshape(-1, 1))
+
+    def predict_one(self, data):
+        """Expected playing percentage for one feature dict already in this model's schema."""
+        return float(self._predict_one(data)[1][0])
+
+    def predict_one_with_interval(self, data):
+        """``(expected playing percentage, p10, p90)`` for one feature dict."""
+        xgb_pred, final_pred = self._predict_one(data)
+        lower, upper = self.interval(final_pred)
+        return float(final_pred[0]), float(lower[0]), float(upper[0])
+
+
+SPECS = [
+    ModelSpec("attacker", "model_attackers.json", "category_mappings_attackers.json",
+              position_groups=["attacker"], prepare=attacker_features,
+              calibration_path="xgboost_predictions_test_attackers.csv"),
+    ModelSpec("general", scoring.MODEL_PATH, scoring.MAPPINGS_PATH, gam_path=scoring.GAM_PATH,
+              calibration_path=intervals.CALIBRATION_PATH),
+]
+
+
+def get_spec(name, specs=None):
+    for spec in specs or SPECS:
+        if spec.name == name:
+            return spec
+    raise KeyError(f"No model spec named {name!r}")
+
+
+def spec_for(position_group, specs=None):
+    """The spec serving ``position_group``, falling back to the spec without position groups."""
+    specs = specs or SPECS
+    fallback = None
+    for spec in specs:
+        if spec.position_groups is None:
+            fallback = fallback or spec
+        elif position_group in spec.position_groups:
+            return spec
+    if fallback is None:
+        raise KeyError(f"No model spec serves position group {position_group!r}")
+    return fallback
+
+
+def route(df, specs=None):
+    """Name of the spec serving each row of ``df``, as an array aligned with its rows."""
+    groups = df["positionGroup"] if "positionGroup" in df.columns else pd.Series(None, index=df.index)
+    names = {group: spec_for(group, specs).name for group in groups.unique()}
+    return groups.map(names).to_numpy()
+
+
+def score_frame(df, specs=None):
+    """Score a mixed batch, one vectorized predict per model.
+
+    Returns a copy of ``df`` with ``model``, ``xgb_prediction``,
+    ``expected_playing_percentage``, ``expected_playing_p10``,
+    ``expected_playing_p90`` and ``recommendation`` columns appended.
+    """
+    specs = specs or SPECS
+    routes = route(df, specs)
+    heads = np.full((4, len(df)), np.nan)
+    for name in pd.unique(routes):
+        rows = np.flatnonzero(routes == name)
+        heads[:, rows] = get_spec(name, specs).predict_with_interval(df.iloc[rows])
+    return attach_predictions(df, routes, heads)
+
+
+def score_frames(frames, specs=None):
+    """``[score_frame(df) for df in frames]`` with one predict per model over all of them.
+
+    Every frame is encoded on its own, so a row gets the same model input
+    (derived values, fills for absent columns) as when its frame is scored
+    alone, whatever columns the other frames carry.
+    """
+    specs = specs or SPECS
+    routes = [route(df, specs) for df in frames]
+    heads = [np.full((4, len(df)), np.nan) for df in frames]
+    for name in pd.unique(np.concatenate(routes)):
+        spec = get_spec(name, specs)
+        parts = [(i, np.flatnonzero(frame_routes == name)) for i, frame_routes in enumerate(routes)]
+        parts = [(i, rows) for i, rows in parts if len(rows)]
+        model_input = pd.concat([spec.encode(frames[i].iloc[rows]) for i, rows in parts])
+        xgb_pred, final_pred = spec.predict_encoded(model_input)
+        values = np.vstack([xgb_pred, final_pred, *spec.interval(final_pred)])
+        offset = 0
+        for i, rows in parts:
+            heads[i][:, rows] = values[:, offset:offset + len(rows)]
+            offset += len(rows)
+    return [attach_predictions(df, frame_routes, frame_heads)
+            for df, frame_routes, frame_heads in zip(frames, routes, heads)]
+
+
+def attach_predictions(df, routes, heads):
+    """Copy of ``df`` with the ``score_frame`` output columns.
+
+    ``heads`` stacks the XGBoost output, the expected playing percentage and
+    its P10/P90 bounds, one row each, aligned with the rows of ``df``.
+    """
+    scored = df.copy()
+    scored["model"] = routes
+    scored["xgb_prediction"], scored["expected_playing_percentage"] = heads[0], heads[1]
+    scored["expected_playing_p10"], scored["expected_playing_p90"] = heads[2], heads[3]
+    scored["recommendation"] = scoring.recommendation_band(heads[1])
+    return scored
+
+
+def warm(specs=None):
+    """Load every model the engine can route to."""
+    for spec in specs or SPECS:
+        spec.warm()
@@ -0,0 +1,94 @@
+"""Per-prediction feature contributions from XGBoost's native TreeSHAP.
+
+``Booster.predict(..., pred_contribs=True)`` returns, for every row, one
+SHAP value per feature plus the bias (expected model output); together they
+sum to the raw XGBoost prediction. No separate explainer model is needed and
+the row is encoded exactly as for the prediction: the single-row path reuses
+the ``fast_encoder`` row, and ``score_and_explain`` passes one
+``ModelSpec.encode`` frame to both ``predict`` and ``pred_contribs``.
+
+Contributions are on the XGBoost output scale, i.e. before the GAM
+metamodel, which is a monotone one-dimensional recalibration of that output.
+
+XGBoost evaluates TreeSHAP in parallel over rows on all cores (OpenMP);
+exact contributions of the general model cost about 1.8 ms per row and core.
+"""
+import numpy as np
+import pandas as pd
+
+import metrics
+
+BIAS = "bias"
+CONTRIB_PREFIX = "contrib_"
+
+
+def _contribs(model, encoder, model_input):
+    import xgboost as xgb
+
+    booster = model.get_booster()
+    dmatrix = xgb.DMatrix(model_input, feature_names=booster.feature_names, feature_types=booster.feature_types,
+                          enable_categorical=True)
+    return booster.predict(dmatrix, pred_contribs=True, iteration_range=encoder.iteration_range)
+
+
+def explain_one(data, spec):
+    """Contributions for one feature dict as a Series (features, then ``bias``); sums to the XGBoost output."""
+    import fast_encoder
+
+    model = spec.model()
+    encoder = fast_encoder.get_encoder(model, spec.category_mappings)
+    with metrics.span("explain"):
+        values = _contribs(model, encoder, encoder.encode(data))[0]
+    return pd.Series(values, index=encoder.feature_names + [BIAS])
+
+
+def contributions(df, spec, model_input=None):
+    """Contributions for every row of ``df`` scored by ``spec``; one column per feature plus ``bias``.
+
+    ``model_input`` is ``spec.encode(df)`` if the caller already has it.
+    """
+    import fast_encoder
+
+    model = spec.model()
+    encoder = fast_encoder.get_encoder(model, spec.category_mappings)
+    if model_input is None:
+        model_input = spec.encode(df)
+    with metrics.span("explain"):
+        values = _contribs(model, encoder, model_input)
+    return pd.DataFrame(values, index=df.index, columns=encoder.feature_names + [BIAS])
+
+
+def score_and_explain(df, specs=None):
+    """``(engine.score_frame(df), contributions)`` for a mixed shortlist, every routed part encoded once for both.
+
+    The contributions are ``contrib_<feature>`` columns in the input row
+    order; rows scored by a model without a given feature hold NaN in its
+    column.
+    """
+    import engine
+
+    routes = engine.route(df, specs)
+    heads = np.full((4, len(df)), np.nan)
+    parts = []
+    for name in pd.unique(routes):
+        spec = engine.get_spec(name, specs)
+        rows = np.flatnonzero(routes == name)
+        part = df.iloc[rows]
+        model_input = spec.encode(part)
+        xgb_pred, final_pred = spec.predict_encoded(model_input)
+        heads[:, rows] = (xgb_pred, final_pred, *spec.interval(final_pred))
+        parts.append(contributions(part, spec, model_input))
+    explained = pd.concat(parts).reindex(df.index).add_prefix(CONTRIB_PREFIX)
+    return engine.attach_predictions(df, routes, heads), explained
+
+
+def top_features(explained, n=3):
+    """``"feature (+x.xx)"`` labels of the ``n`` strongest contributions per row of ``score_and_explain`` output."""
+    values = explained.drop(columns=CONTRIB_PREFIX + BIAS).fillna(0.0)
+    names = np.array([col[len(CONTRIB_PREFIX):] for col in values.columns])
+    array = values.to_numpy()
+    order = np.argsort(-np.abs(array), axis=1)[:, :n]
+    return [
+        ", ".join(f"{names[j]} ({array[i, j]:+.2f})" for j in row)
+        for i, row in enumerate(order)
+    ]
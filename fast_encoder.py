@@ -0,0 +1,99 @@
+"""Single-row fast path for XGBoost predictions.
+
+Building a one-row DataFrame and typing every categorical column with
+``pd.Categorical`` costs far more than evaluating the trees. The encoder
+precomputes the column order and the category codes from
+``category_mappings.json``, writes a feature dict straight into a float32
+row and calls ``Booster.inplace_predict``. Unknown categories become NaN,
+exactly like the code -1 ``pd.Categorical`` produces.
+
+``python fast_encoder.py`` checks parity with the DataFrame path on rows
+from the test set.
+"""
+import math
+import sys
+import threading
+import weakref
+
+import numpy as np
+
+
+class FastRowEncoder:
+    def __init__(self, model, category_mappings):
+        self.booster = model.get_booster()
+        self.category_mappings = category_mappings
+        self.feature_names = list(model.feature_names_in_)
+        self._codes = [
+            {value: code for code, value in enumerate(category_mappings[name])} if name in category_mappings else None
+            for name in self.feature_names
+        ]
+        try:
+            self.iteration_range = (0, model.best_iteration + 1)
+        except AttributeError:
+            self.iteration_range = (0, 0)
+        self._local = threading.local()
+
+    def _row(self):
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = self._local.row = np.empty((1, len(self.feature_names)), dtype=np.float32)
+        return row
+
+    def encode(self, data):
+        """Encode a feature dict into the (thread-local, reused) model input row."""
+        row = self._row()
+        for i, (name, codes) in enumerate(zip(self.feature_names, self._codes)):
+            value = data.get(name, 0)
+            if codes is not None:
+                try:
+                    code = codes.get(value)
+                except TypeError:  # unhashable value
+                    code = None
+                row[0, i] = math.nan if code is None else code
+            else:
+                row[0, i] = math.nan if value is None else value
+        return row
+
+    def predict(self, data):
+        """Raw XGBoost prediction for one feature dict, as a length-1 array."""
+        return self.booster.inplace_predict(self.encode(data), iteration_range=self.iteration_range)
+
+
+_encoders = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_encoder(model, category_mappings):
+    """Encoder for ``model``, built once per loaded model instance and ``category_mappings`` version."""
+    with _lock:
+        encoder = _encoders.get(model)
+        if encoder is None or encoder.category_mappings is not category_mappings:
+            encoder = _encoders[model] = FastRowEncoder(model, category_mappings)
+        return encoder
+
+
+def check_parity(n_rows=500, predictions_path="xgboost_predictions_test.csv", atol=1e-4):
+    """Compare the fast path with ``model.predict`` on a DataFrame; returns the max abs difference."""
+    import pandas as pd
+
+    import model_registry
+    import scoring
+
+    model = model_registry.load_xgb_model(scoring.MODEL_PATH)
+    category_mappings = scoring.load_category_mappings()
+    encoder = get_encoder(model, category_mappings)
+
+    df = scoring.engineer_features(pd.read_csv(predictions_path, nrows=n_rows))
+    worst = 0.0
+    for data in df.reindex(columns=model.feature_names_in_, fill_value=0).to_dict(orient="records"):
+        input_df = scoring.encode_categories(pd.DataFrame([data]), category_mappings)
+        expected = model.predict(input_df)[0]
+        worst = max(worst, abs(float(encoder.predict(data)[0]) - float(expected)))
+    if worst > atol:
+        raise AssertionError(f"fast path differs from DataFrame path by {worst:.6f}")
+    return worst
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"max abs difference over {n_rows} rows: {check_parity(n_rows):.2e}")
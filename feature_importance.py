@@ -0,0 +1,65 @@
+"""Feature-importance chart and breakdown, computed once per model version.
+
+The chart is rendered to PNG bytes with matplotlib's object-oriented API
+(``Figure`` is never registered with pyplot, so nothing accumulates in
+long-running server processes) and cached together with the per-feature
+weight/gain/cover table, keyed by the model file's path and mtime.
+"""
+import io
+import threading
+from functools import lru_cache
+
+import model_registry
+
+IMPORTANCE_TYPES = ["weight", "gain", "cover", "total_gain", "total_cover"]
+
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def _compute(model_path, version, top_n):
+    import numpy as np
+    import pandas as pd
+    from matplotlib.figure import Figure
+
+    model = model_registry.load_xgb_model(model_path)
+    booster = model.get_booster()
+    names = list(model.feature_names_in_)
+
+    table = pd.DataFrame(
+        {kind: pd.Series(booster.get_score(importance_type=kind), dtype=float) for kind in IMPORTANCE_TYPES},
+        index=names,
+    ).fillna(0.0)
+    table.insert(0, "importance", model.feature_importances_)
+    table = table.sort_values("importance", ascending=False)
+    table.index.name = "feature"
+
+    importances = model.feature_importances_
+    indices = np.argsort(importances)[::-1][:top_n]
+    features = np.array(names)[indices]
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.barh(features[::-1], importances[indices][::-1])
+    ax.set_title(f"Top {top_n} Feature Importances")
+    ax.set_xlabel("Importance")
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=110)
+    fig.clear()
+    return buffer.getvalue(), table
+
+
+def _cached(model_path, top_n):
+    with _lock:
+        return _compute(model_path, model_registry.model_version(model_path), top_n)
+
+
+def importance_chart(model_path, top_n=10):
+    """PNG bytes of the top-``top_n`` importance bar chart."""
+    return _cached(model_path, top_n)[0]
+
+
+def importance_table(model_path):
+    """Per-feature importance with the booster's weight/gain/cover breakdown."""
+    return _cached(model_path, 10)[1]
@@ -0,0 +1,105 @@
+"""Compiled form of the GAM metamodel in ``gam_model.pkl``.
+
+The metamodel is a pyGAM ``LinearGAM`` with a single spline term over the
+XGBoost output. Between its edge knots it is tabulated on a dense grid and
+evaluated with ``np.interp``; beyond them pyGAM extrapolates linearly, which
+is reproduced from the stored end slopes. Evaluating the table needs only
+NumPy, so pyGAM and scipy are not imported at runtime.
+
+Usage:
+    python gam_export.py            # writes gam_model_table.npz and validates it
+
+The table records the SHA-1 of the pickle it was built from;
+``load_compiled`` ignores a table that does not match the current pickle.
+"""
+import hashlib
+import os
+import sys
+
+import numpy as np
+
+GAM_PATH = "gam_model.pkl"
+N_POINTS = 8193
+TOLERANCE = 1e-3
+
+
+def table_path(gam_path):
+    return f"{os.path.splitext(gam_path)[0]}_table.npz"
+
+
+def _sha1(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class CompiledGAM:
+    """Drop-in replacement for ``LinearGAM.predict`` on a single feature."""
+
+    def __init__(self, x, y, left_slope, right_slope):
+        self.x = x
+        self.y = y
+        self.left_slope = float(left_slope)
+        self.right_slope = float(right_slope)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64).reshape(-1)
+        out = np.interp(X, self.x, self.y)
+        below, above = X < self.x[0], X > self.x[-1]
+        out[below] = self.y[0] + (X[below] - self.x[0]) * self.left_slope
+        out[above] = self.y[-1] + (X[above] - self.x[-1]) * self.right_slope
+        return out
+
+
+def compile_gam(gam, n_points=N_POINTS):
+    lo, hi = np.ravel(gam.terms[0].edge_knots_)[[0, -1]]
+    x = np.linspace(lo, hi, n_points)
+    y = gam.predict(x.reshape(-1, 1))
+    # pyGAM is linear outside the edge knots, so one unit step gives the exact slope
+    outside = gam.predict(np.array([[lo - 2.0], [lo - 1.0], [hi + 1.0], [hi + 2.0]]))
+    return CompiledGAM(x, y, outside[1] - outside[0], outside[3] - outside[2])
+
+
+def validate(gam, compiled, tolerance=TOLERANCE):
+    """Max abs difference between the original GAM and the compiled table."""
+    lo, hi = compiled.x[0], compiled.x[-1]
+    probe = np.concatenate([
+        np.linspace(lo - 100, hi + 100, 200_001),
+        np.random.default_rng(0).uniform(lo, hi, 100_000),
+    ])
+    error = np.abs(gam.predict(probe.reshape(-1, 1)) - compiled.predict(probe)).max()
+    if error > tolerance:
+        raise AssertionError(f"compiled GAM differs from the original by {error:.2e} (tolerance {tolerance:.0e})")
+    return error
+
+
+def export(gam_path=GAM_PATH, n_points=N_POINTS):
+    import joblib
+
+    gam = joblib.load(gam_path)
+    compiled = compile_gam(gam, n_points)
+    error = validate(gam, compiled)
+    np.savez(
+        table_path(gam_path),
+        x=compiled.x,
+        y=compiled.y,
+        slopes=np.array([compiled.left_slope, compiled.right_slope]),
+        source_sha1=np.array(_sha1(gam_path)),
+    )
+    return error
+
+
+def load_compiled(gam_path=GAM_PATH):
+    """Compiled GAM for ``gam_path``, or None if there is no up-to-date table."""
+    path = table_path(gam_path)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as table:
+        if str(table["source_sha1"]) != _sha1(gam_path):
+            return None
+        return CompiledGAM(table["x"], table["y"], *table["slopes"])
+
+
+if __name__ == "__main__":
+    gam_path = sys.argv[1] if len(sys.argv) > 1 else GAM_PATH
+    error = export(gam_path)
+    print(f"{gam_path} -> {table_path(gam_path)} (max abs error {error:.2e})")
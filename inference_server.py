@@ -0,0 +1,224 @@
+"""Local HTTP/JSON inference server for the XGBoost + GAM model.
+
+Usage:
+    python inference_server.py --port 8765
+
+    curl -s localhost:8765/predict -d '{"rows": [{"height": 180, "transferAge": 25, ...}]}'
+
+Rows use the same raw column names as ``batch_score.py``. Requests arriving
+within a short window (``--window-ms``) are merged into one micro-batch and
+scored with a single vectorized predict, so throughput grows with load
+instead of paying the per-call predict overhead per request. Each request is
+still encoded on its own (``engine.score_frames``), so its predictions do not
+depend on which columns the other requests in its batch send. Values of
+numeric features that are not numbers are rejected with a 400.
+
+``--route`` scores each row with the model for its position group (see
+engine.py) instead of the general model only.
+
+Endpoints:
+    POST /predict  {"rows": [...]} or a single row object
+    GET  /health   resident models and batching statistics
+    GET  /metrics  stage timing histograms (Prometheus text; /metrics.json for JSON)
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+import engine
+import metrics
+import model_registry
+import pipeline
+
+OUTPUT_COLUMNS = ["model", "xgb_prediction", "expected_playing_percentage", "expected_playing_p10", "expected_playing_p90",
+                  "recommendation"]
+
+
+class MicroBatcher:
+    """Collect concurrent scoring requests and score them together.
+
+    ``specs`` are the models rows are routed to (see engine.py); the default
+    scores every row with the general model.
+    """
+
+    def __init__(self, window_ms=5.0, max_batch_rows=4096, specs=None):
+        self.window = window_ms / 1000
+        self.specs = specs if specs is not None else [engine.get_spec("general")]
+        self.numeric_columns = pipeline.numeric_columns(self.specs)
+        self.max_batch_rows = max_batch_rows
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.rows = 0
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        """Queue a list of row dicts; returns a Future resolving to a list of prediction dicts."""
+        future = Future()
+        self._queue.put((rows, future))
+        return future
+
+    def _collect(self):
+        pending = [self._queue.get()]
+        n_rows = len(pending[0][0])
+        deadline = time.monotonic() + self.window
+        while n_rows < self.max_batch_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            n_rows += len(item[0])
+        return pending
+
+    def _score(self, requests):
+        """Prediction dicts for every request (a list of row dicts), scored in one batch."""
+        with metrics.span("batch.score"):
+            frames = [pipeline.coerce_numeric(pd.DataFrame(rows), self.numeric_columns)[0] for rows in requests]
+            scored = engine.score_frames(frames, self.specs)
+        return [frame[OUTPUT_COLUMNS].to_dict(orient="records") for frame in scored]
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            try:
+                results = self._score([rows for rows, _ in pending])
+            except Exception:
+                # A malformed row fails the merged batch; score each request alone so only its sender sees the error
+                for rows, future in pending:
+                    try:
+                        future.set_result(self._score([rows])[0])
+                    except Exception as exc:
+                        future.set_exception(exc)
+                        continue
+                    self.batches += 1
+                    self.rows += len(rows)
+                continue
+
+            self.batches += 1
+            for (rows, future), predictions in zip(pending, results):
+                self.rows += len(rows)
+                future.set_result(predictions)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_rows": self.rows / self.batches if self.batches else 0.0,
+        }
+
+
+def invalid_values(rows, numeric_columns):
+    """``"non-numeric <column> in row <i>"`` for every value of a numeric feature that is not a number."""
+    problems = []
+    for i, row in enumerate(rows):
+        for col in numeric_columns:
+            value = row.get(col)
+            if value is None or isinstance(value, (int, float)):
+                continue
+            try:
+                float(value)
+            except (TypeError, ValueError):
+                problems.append(f"non-numeric {col} in row {i}")
+    return problems
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    batcher = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"models": model_registry.resident_models(), "batching": self.batcher.stats()})
+        elif self.path == "/metrics.json":
+            self._send_json(200, metrics.snapshot())
+        elif self.path == "/metrics":
+            body = metrics.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            rows = payload["rows"] if isinstance(payload, dict) and "rows" in payload else payload
+            rows = [rows] if isinstance(rows, dict) else rows
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                raise ValueError("expected a row object or {\"rows\": [...]}")
+            problems = invalid_values(rows, self.batcher.numeric_columns)
+            if problems:
+                raise ValueError("; ".join(problems))
+        except (ValueError, KeyError) as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+
+        if not rows:
+            self._send_json(200, {"predictions": []})
+            return
+        try:
+            predictions = self.batcher.submit(rows).result()
+        except Exception as exc:
+            self._send_json(500, {"error": f"{type(exc).__name__}: {exc}"})
+            return
+        self._send_json(200, {"predictions": predictions})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class InferenceServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def serve(host="127.0.0.1", port=8765, window_ms=5.0, max_batch_rows=4096, route=False):
+    specs = engine.SPECS if route else [engine.get_spec("general")]
+    # Warm the model registry before accepting traffic
+    engine.warm(specs)
+    InferenceHandler.batcher = MicroBatcher(window_ms, max_batch_rows, specs)
+    server = InferenceServer((host, port), InferenceHandler)
+    print(f"Serving predictions on http://{host}:{port}/predict")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local micro-batching inference server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=5.0, help="how long to wait for more requests per batch")
+    parser.add_argument("--max-batch-rows", type=int, default=4096)
+    parser.add_argument("--route", action="store_true", help="score each row with the model for its position group")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.window_ms, args.max_batch_rows, args.route)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""P10–P90 prediction intervals calibrated on the held-out residuals.
+
+The held-out test set is re-scored once by the model the band is for, down
+to the value that is displayed (the GAM-calibrated expected playing
+percentage where the model has a metamodel), and its residuals
+``Actual − prediction`` are split into ``N_BINS`` equally populated bins of
+the prediction. The 10th/90th residual percentiles of each bin give the
+band around a new prediction: ``clip(pred + q10(bin), pred + q90(bin))``.
+Errors are larger for mid-range outputs than at the extremes, which a
+single global band would hide.
+
+Calibrating on the displayed output (rather than on the raw XGBoost output,
+or on the ``Predicted`` column stored with the test set, which may come from
+another model version) keeps the band around the number it is shown with.
+Applying it needs only the prediction, so it is one ``searchsorted`` over
+the batch and the features are never encoded a second time.
+
+``python intervals.py`` reports the in-sample and two-fold cross-fitted
+coverage of ``Actual`` for every model.
+"""
+import os
+from functools import lru_cache
+
+import numpy as np
+
+CALIBRATION_PATH = "xgboost_predictions_test.csv"
+TARGET_COLUMNS = ["Actual", "Predicted", "Residual"]
+QUANTILES = (0.1, 0.9)
+N_BINS = 10
+BOUNDS = (0.0, 100.0)
+
+
+class ResidualCalibration:
+    def __init__(self, edges, lower, upper):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, predicted, residual, n_bins=N_BINS, quantiles=QUANTILES):
+        predicted = np.asarray(predicted, dtype=np.float64)
+        residual = np.asarray(residual, dtype=np.float64)
+        keep = np.isfinite(predicted) & np.isfinite(residual)
+        predicted, residual = predicted[keep], residual[keep]
+
+        edges = np.unique(np.quantile(predicted, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        bins = np.searchsorted(edges, predicted, side="right")
+        lower, upper = np.empty(len(edges) + 1), np.empty(len(edges) + 1)
+        for i in range(len(edges) + 1):
+            lower[i], upper[i] = np.quantile(residual[bins == i], quantiles)
+        return cls(edges, lower, upper)
+
+    def interval(self, predictions):
+        """``(lower, upper)`` arrays around predictions on the calibrated scale, clipped to 0–100 %.
+
+        The band is widened where needed to contain the prediction itself, so
+        a biased model never shows a point estimate outside its own range.
+        """
+        predictions = np.asarray(predictions, dtype=np.float64)
+        bins = np.searchsorted(self.edges, predictions, side="right")
+        return (
+            np.clip(predictions + np.minimum(self.lower[bins], 0.0), *BOUNDS),
+            np.clip(predictions + np.maximum(self.upper[bins], 0.0), *BOUNDS),
+        )
+
+    def coverage(self, predictions, actual):
+        """Share of ``actual`` inside the band around ``predictions``."""
+        lower, upper = self.interval(predictions)
+        return float(np.mean((actual >= lower) & (actual <= upper)))
+
+
+def held_out(path):
+    """``(features, Actual)`` of the test set at ``path``, rows without a target dropped."""
+    import pandas as pd
+
+    df = pd.read_csv(path).dropna(subset=["Actual"]).reset_index(drop=True)
+    return df.drop(columns=[col for col in TARGET_COLUMNS if col in df.columns]), df["Actual"].to_numpy()
+
+
+@lru_cache(maxsize=8)
+def _load(path, mtime, predict, version):
+    features, actual = held_out(path)
+    predicted = np.asarray(predict(features), dtype=np.float64)
+    return ResidualCalibration.fit(predicted, actual - predicted)
+
+
+def load_calibration(path, predict, version):
+    """Calibration of ``predict`` (test-set features -> displayed prediction) on the test set at ``path``.
+
+    Refitted only when the file or ``version`` (the model files' versions) changes.
+    """
+    return _load(os.path.abspath(path), os.path.getmtime(path), predict, version)
+
+
+def cross_fitted_coverage(predicted, actual, seed=0):
+    """Coverage when each half of the test set is covered by a band fitted on the other half."""
+    halves = np.random.default_rng(seed).permutation(len(actual)) % 2 == 0
+    covered = 0.0
+    for fit_rows in (halves, ~halves):
+        calibration = ResidualCalibration.fit(predicted[fit_rows], actual[fit_rows] - predicted[fit_rows])
+        covered += calibration.coverage(predicted[~fit_rows], actual[~fit_rows]) * (~fit_rows).sum()
+    return covered / len(actual)
+
+
+if __name__ == "__main__":
+    import engine
+
+    nominal = QUANTILES[1] - QUANTILES[0]
+    for spec in engine.SPECS:
+        features, actual = held_out(spec.calibration_path)
+        predicted = spec.predict(features)[1]
+        print(f"{spec.name:9s} {len(actual):6d} rows  nominal {nominal:.2f}  "
+              f"in-sample {spec.calibration().coverage(predicted, actual):.3f}  "
+              f"cross-fitted {cross_fitted_coverage(predicted, actual):.3f}")
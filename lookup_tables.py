@@ -0,0 +1,105 @@
+"""Derived lookup tables for the dashboard inputs.
+
+``position_group_to_main`` (which main positions belong to a position group),
+``area_to_levels`` (which competition levels exist per country) and the
+valid category lists are derived from the test-set CSV and the category
+mappings. Deriving them means parsing a multi-MB CSV, so the result is stored
+as a small JSON artifact under ``.cache/`` together with the modification
+times of its sources, and rebuilt only when one of them changes. The
+artifact is written to a temporary file and moved into place, so concurrent
+rebuilds never leave a partial file; an unreadable artifact counts as stale.
+"""
+import json
+import os
+import tempfile
+from functools import lru_cache
+
+CACHE_DIR = ".cache"
+
+_AREA_LEVEL_COLUMNS = [
+    ("from_competition_competition_area", "from_competition_competition_level"),
+    ("to_competition_competition_area", "to_competition_competition_level"),
+]
+
+
+def _sources(predictions_path, mappings_path):
+    return {path: os.stat(path).st_mtime_ns for path in (predictions_path, mappings_path)}
+
+
+def build_lookups(predictions_path, mappings_path):
+    import pandas as pd
+
+    columns = ["positionGroup", "mainPosition"] + [c for pair in _AREA_LEVEL_COLUMNS for c in pair]
+    df = pd.read_csv(predictions_path, usecols=columns)
+
+    position_group_to_main = df.groupby("positionGroup")["mainPosition"].unique().apply(list).to_dict()
+
+    area_levels = pd.concat(
+        [df[list(pair)].set_axis(["area", "level"], axis=1) for pair in _AREA_LEVEL_COLUMNS]
+    ).dropna()
+    area_levels = area_levels[area_levels["area"] != "other"]
+    area_to_levels = (
+        area_levels.groupby("area")["level"].apply(lambda levels: sorted(int(l) for l in levels.unique())).to_dict()
+    )
+
+    with open(mappings_path) as f:
+        category_mappings = json.load(f)
+
+    return {
+        "position_group_to_main": position_group_to_main,
+        "area_to_levels": area_to_levels,
+        "category_mappings": category_mappings,
+    }
+
+
+def _artifact_path(predictions_path):
+    return os.path.join(CACHE_DIR, f"lookups_{os.path.splitext(os.path.basename(predictions_path))[0]}.json")
+
+
+def _read_artifact(artifact):
+    try:
+        with open(artifact) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=8)
+def _load(predictions_path, mappings_path, sources_key):
+    sources = dict(sources_key)
+    artifact = _artifact_path(predictions_path)
+    cached = _read_artifact(artifact)
+    if isinstance(cached, dict) and cached.get("sources") == sources and "tables" in cached:
+        return cached["tables"]
+
+    tables = build_lookups(predictions_path, mappings_path)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump({"sources": sources, "tables": tables}, f)
+        os.replace(tmp_path, artifact)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tables
+
+
+def load_lookups(predictions_path="xgboost_predictions_test.csv", mappings_path="category_mappings.json"):
+    """Lookup tables for one dashboard, rebuilt only if the CSV or the mappings changed.
+
+    Returns a dict with ``position_group_to_main``, ``area_to_levels`` and
+    ``category_mappings``. The dict is shared within the process; treat it as
+    read-only.
+    """
+    sources = _sources(predictions_path, mappings_path)
+    return _load(predictions_path, mappings_path, tuple(sorted(sources.items())))
+
+
+if __name__ == "__main__":
+    for predictions_path, mappings_path in [
+        ("xgboost_predictions_test.csv", "category_mappings.json"),
+        ("xgboost_predictions_test_attackers.csv", "category_mappings_attackers.json"),
+    ]:
+        load_lookups(predictions_path, mappings_path)
+        print(f"{predictions_path} -> {_artifact_path(predictions_path)}")
@@ -0,0 +1,150 @@
+"""Lightweight per-stage timing for the dashboards and the inference server.
+
+Wrap a stage in ``with metrics.span("xgboost"):`` and its wall-clock time
+is added to a process-wide histogram for that stage. If the current thread
+has started a trace with ``begin_trace()`` (the dashboard does this on
+every run), the span is also appended to that trace, which gives the
+breakdown of the current request.
+
+Histograms are exported in Prometheus text format (``prometheus_text()``)
+or as JSON (``snapshot()``), and ``start_exporter(port)`` serves both over
+HTTP at ``/metrics`` and ``/metrics.json``. Only the standard library is
+used, so importing this module costs nothing measurable at startup.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+METRIC_NAME = "transfer_predictor_stage_seconds"
+
+_lock = threading.Lock()
+_histograms = {}
+_local = threading.local()
+_exporter = None
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                break
+        else:
+            i = len(BUCKETS_MS)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+
+def observe(stage, ms):
+    """Record one ``ms`` duration for ``stage``."""
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        histogram.observe(ms)
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.append({"stage": stage, "ms": round(ms, 3)})
+
+
+@contextmanager
+def span(stage):
+    """Time the enclosed block as ``stage``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, (time.perf_counter() - start) * 1000)
+
+
+def begin_trace():
+    """Collect this thread's following spans into a new list, which is returned."""
+    _local.trace = []
+    return _local.trace
+
+
+def snapshot():
+    """Per-stage histograms as a JSON-serializable dict."""
+    with _lock:
+        return {
+            stage: {
+                "count": h.count,
+                "sum_ms": round(h.sum_ms, 3),
+                "mean_ms": round(h.sum_ms / h.count, 3) if h.count else 0.0,
+                "max_ms": round(h.max_ms, 3),
+                "buckets_ms": dict(zip([str(b) for b in BUCKETS_MS] + ["+Inf"], h.counts)),
+            }
+            for stage, h in _histograms.items()
+        }
+
+
+def summary():
+    """One row per stage (count, mean, max) for display in the dashboard."""
+    return [
+        {"stage": stage, "count": stats["count"], "mean_ms": stats["mean_ms"], "max_ms": stats["max_ms"]}
+        for stage, stats in sorted(snapshot().items())
+    ]
+
+
+def prometheus_text():
+    """All histograms in the Prometheus text exposition format (seconds)."""
+    lines = [
+        f"# HELP {METRIC_NAME} Wall-clock time per prediction stage.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    with _lock:
+        for stage, h in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, count in zip(list(BUCKETS_MS) + [None], h.counts):
+                cumulative += count
+                le = "+Inf" if bound is None else repr(bound / 1000)
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {h.sum_ms / 1000:.6f}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {h.count}')
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def start_exporter(port, host="127.0.0.1"):
+    """Serve ``/metrics`` and ``/metrics.json`` from a daemon thread (once per process)."""
+    global _exporter
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = prometheus_text().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = json.dumps(snapshot()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    with _lock:
+        if _exporter is None:
+            _exporter = ThreadingHTTPServer((host, port), MetricsHandler)
+            _exporter.daemon_threads = True
+            threading.Thread(target=_exporter.serve_forever, name="metrics-exporter", daemon=True).start()
+        return _exporter
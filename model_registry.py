@@ -0,0 +1,127 @@
+"""Process-wide registry for the trained models used by the dashboards.
+
+Streamlit re-executes the app scripts on every interaction, but imported
+modules stay resident, so models held here are loaded once per process and
+shared by every session and by both dashboards. Entries are keyed by the
+absolute file path and its modification time: replacing a model file on disk
+makes the next lookup load the new version (hot reload).
+
+xgboost and joblib are imported on the first load, not when this module is
+imported, to keep the dashboards' cold start short.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+
+_lock = threading.Lock()
+_models = {}
+
+
+def _read_xgb(path):
+    import xgboost as xgb
+
+    model = xgb.XGBRegressor()
+    model.load_model(path)
+    return model
+
+
+def _read_gam(path):
+    import gam_export
+
+    # Prefer the NumPy table exported by gam_export.py; fall back to unpickling pyGAM
+    compiled = gam_export.load_compiled(path)
+    if compiled is not None:
+        return compiled
+    import joblib
+
+    return joblib.load(path)
+
+
+_LOADERS = {
+    "xgboost": _read_xgb,
+    "gam": _read_gam,
+}
+
+
+def _get(path, kind):
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    with _lock:
+        entry = _models.get(path)
+        if entry is None or entry["mtime"] != mtime:
+            start = time.perf_counter()
+            model = _LOADERS[kind](path)
+            entry = {
+                "model": model,
+                "kind": kind,
+                "mtime": mtime,
+                "loaded_at": time.time(),
+                "load_seconds": time.perf_counter() - start,
+                "hits": 0,
+            }
+            _models[path] = entry
+        entry["hits"] += 1
+        return entry["model"]
+
+
+def load_xgb_model(path):
+    """Return the XGBRegressor stored at ``path``, loading it at most once per file version."""
+    return _get(path, "xgboost")
+
+
+def load_gam_model(path):
+    """Return the GAM metamodel stored at ``path``, loading it at most once per file version.
+
+    If ``gam_export.py`` has produced an up-to-date table for the pickle, the
+    compiled NumPy evaluator is returned instead of the pyGAM object.
+    """
+    return _get(path, "gam")
+
+
+@lru_cache(maxsize=16)
+def _feature_names(path, mtime):
+    if path.endswith(".json"):
+        with open(path) as f:
+            return tuple(json.load(f)["learner"]["feature_names"])
+    return tuple(load_xgb_model(path).feature_names_in_)
+
+
+def feature_names(path):
+    """Input feature names of the XGBoost model at ``path``.
+
+    JSON models are read without importing xgboost, so the dashboards can
+    lay out the feature vector before the model itself is needed.
+    """
+    path = os.path.abspath(path)
+    return _feature_names(path, os.path.getmtime(path))
+
+
+def model_version(path):
+    """Identifier of the model file currently on disk, e.g. ``model2.json@1719830400``."""
+    return f"{os.path.basename(path)}@{int(os.path.getmtime(path))}"
+
+
+def resident_models():
+    """Describe every model currently held in memory by this process."""
+    with _lock:
+        return [
+            {
+                "path": path,
+                "kind": entry["kind"],
+                "type": type(entry["model"]).__name__,
+                "file_modified": datetime.fromtimestamp(entry["mtime"]).isoformat(timespec="seconds"),
+                "loaded_at": datetime.fromtimestamp(entry["loaded_at"]).isoformat(timespec="seconds"),
+                "load_ms": round(entry["load_seconds"] * 1000, 1),
+                "hits": entry["hits"],
+            }
+            for path, entry in _models.items()
+        ]
+
+
+def clear():
+    """Drop all resident models; the next lookup reloads them from disk."""
+    with _lock:
+        _models.clear()
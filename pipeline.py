@@ -0,0 +1,199 @@
+"""Streaming ingestion of candidate files of any size: read → validate → encode → score → write.
+
+Each stage is a generator over chunks, so only ``chunk_size`` rows (plus
+their encoded and scored copies) are in memory at any time and peak memory
+does not grow with the file:
+
+* ``read`` yields fixed-size chunks of a CSV or Parquet file,
+* ``validate`` routes every row to its model (see engine.py), brings it into
+  that model's schema and flags values the model cannot use (categories
+  missing from the category mappings, non-numeric values in numeric
+  features) in a ``validation_issues`` column; flagged rows are still scored,
+  with the unusable values treated as missing,
+* ``encode`` types each part against its model's ``category_mappings*.json``,
+* ``score`` runs XGBoost, the GAM and the P10–P90 band once per part,
+* ``write`` appends the scored chunk to the output before the next chunk is
+  read.
+
+Usage:
+    python pipeline.py candidates.csv -o scored.csv
+    python pipeline.py huge.csv -o scored.parquet --chunk-size 100000 --stats-json stats.json
+
+``benchmarks/large_file.py`` runs this on a file larger than the machine's RAM.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import batch_score
+import engine
+import scoring
+
+DEFAULT_CHUNK_SIZE = 50_000
+ISSUES_COLUMN = "validation_issues"
+
+
+class PipelineStats:
+    def __init__(self):
+        self.chunks = 0
+        self.rows = 0
+        self.rows_with_issues = 0
+        self.issues = Counter()
+        self.missing_columns = {}
+
+    def as_dict(self):
+        return {
+            "chunks": self.chunks,
+            "rows": self.rows,
+            "rows_with_issues": self.rows_with_issues,
+            "issues": dict(self.issues.most_common()),
+            "missing_columns": self.missing_columns,
+        }
+
+
+# === STAGES ===
+
+def read(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    yield from batch_score.read_chunks(path, chunk_size)
+
+
+def _issue_labels(index, checks):
+    issues = pd.Series("", index=index, dtype=object)
+    for label, mask in checks:
+        if mask.any():
+            issues[mask] = issues[mask] + label + "; "
+    return issues
+
+
+def numeric_columns(specs=None):
+    """Raw columns that must be numeric: every non-categorical model feature, flags excepted."""
+    return sorted({
+        col for spec in specs or engine.SPECS for col in spec.feature_names
+        if col not in spec.category_mappings and col not in scoring.FLAG_COLUMNS
+    })
+
+
+def coerce_numeric(chunk, columns):
+    """``(chunk with non-numeric values in columns set to NaN, per-row issue labels)``.
+
+    Runs before any feature is derived, so that e.g. a text ``transferAge``
+    cannot break ``value_per_age`` or the attacker age bins.
+    """
+    checks = []
+    chunk = chunk.copy()
+    for col in columns:
+        if col in chunk.columns and chunk[col].dtype == object:
+            values = pd.to_numeric(chunk[col], errors="coerce")
+            checks.append((f"non-numeric {col}", chunk[col].notna() & values.isna()))
+            chunk[col] = values
+    return chunk, _issue_labels(chunk.index, checks)
+
+
+def row_issues(part, spec):
+    """Per-row ``"; "``-terminated category problems of ``part`` (already in ``spec``'s schema) as a Series."""
+    checks = []
+    for col in spec.feature_names:
+        cats = spec.category_mappings.get(col)
+        if col not in part.columns or cats is None:
+            continue
+        if any(isinstance(cat, bool) for cat in cats):
+            continue  # flags are validated by scoring.engineer_features
+        checks.append((f"unknown {col}", part[col].notna() & ~part[col].isin(cats)))
+    return _issue_labels(part.index, checks)
+
+
+def validate(chunks, specs=None, stats=None):
+    """Yield ``(chunk with validation_issues, [(spec, row positions, prepared part), ...])``."""
+    stats = stats if stats is not None else PipelineStats()
+    numeric = numeric_columns(specs)
+    for chunk in chunks:
+        chunk, issues = coerce_numeric(chunk, numeric)
+        routes = engine.route(chunk, specs)
+        parts = []
+        for name in pd.unique(routes):
+            spec = engine.get_spec(name, specs)
+            rows = np.flatnonzero(routes == name)
+            part = chunk.iloc[rows]
+            part = scoring.engineer_features(spec.prepare(part) if spec.prepare is not None else part)
+            if spec.name not in stats.missing_columns:
+                stats.missing_columns[spec.name] = [col for col in spec.feature_names if col not in part.columns]
+            issues.iloc[rows] += row_issues(part, spec).to_numpy()
+            parts.append((spec, rows, part))
+
+        issues = issues.str.rstrip("; ")
+        flagged = issues[issues != ""]
+        stats.rows_with_issues += len(flagged)
+        stats.issues.update(label for row in flagged for label in row.split("; "))
+        yield chunk.assign(**{ISSUES_COLUMN: issues}), parts
+
+
+def encode(validated):
+    """Replace every prepared part by its model input."""
+    for chunk, parts in validated:
+        yield chunk, [
+            (spec, rows, scoring.build_model_input(part, spec.feature_names, spec.category_mappings))
+            for spec, rows, part in parts
+        ]
+
+
+def score(encoded):
+    """Yield each chunk with the ``engine.score_frame`` output columns."""
+    for chunk, parts in encoded:
+        routes = np.empty(len(chunk), dtype=object)
+        heads = np.full((4, len(chunk)), np.nan)
+        for spec, rows, model_input in parts:
+            xgb_pred, final_pred = spec.predict_encoded(model_input)
+            routes[rows] = spec.name
+            heads[:, rows] = (xgb_pred, final_pred, *spec.interval(final_pred))
+        yield engine.attach_predictions(chunk, routes, heads)
+
+
+def write(scored, output_path, stats=None):
+    stats = stats if stats is not None else PipelineStats()
+    writer = batch_score.ChunkWriter(output_path, batch_score.text_columns())
+    try:
+        for chunk in scored:
+            writer.write(chunk)
+            stats.chunks += 1
+            stats.rows += len(chunk)
+    finally:
+        writer.close()
+    return stats
+
+
+def run(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, specs=None):
+    """Stream ``input_path`` through every stage into ``output_path``; returns the ``PipelineStats``."""
+    engine.warm(specs)
+    stats = PipelineStats()
+    validated = validate(read(input_path, chunk_size), specs, stats)
+    return write(score(encode(validated)), output_path, stats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate, encode and score a candidate file chunk by chunk.")
+    parser.add_argument("input", help="CSV or Parquet file with one candidate per row")
+    parser.add_argument("-o", "--output", required=True, help="destination .csv or .parquet file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows held in memory per stage")
+    parser.add_argument("--stats-json", help="write row and validation counts to this file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    stats = run(args.input, args.output, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {stats.rows} rows in {stats.chunks} chunks in {elapsed:.2f}s "
+          f"({stats.rows / max(elapsed, 1e-9):,.0f} rows/s), {stats.rows_with_issues} with validation issues "
+          f"-> {args.output}", file=sys.stderr)
+    for label, count in stats.issues.most_common(10):
+        print(f"  {count:10d}  {label}", file=sys.stderr)
+    if args.stats_json:
+        with open(args.stats_json, "w") as f:
+            json.dump({**stats.as_dict(), "seconds": round(elapsed, 3)}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""In-process LRU/TTL cache for dashboard predictions.
+
+Scouts often re-run identical configurations (toggling the loan flag back
+and forth, switching the destination level and back). Results are keyed on a
+canonical hash of the engineered feature vector plus the versions of the
+model files, so an exact repeat skips XGBoost, the GAM and the similarity
+search entirely.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import model_registry
+
+
+def _canonical(value):
+    if hasattr(value, "item"):  # numpy scalars
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def feature_key(data, category_mappings, version, raw=None):
+    """Canonical hash of a feature dict after category typing.
+
+    Values outside a column's known categories are typed as missing by
+    ``pd.Categorical``, so they all hash as ``None``. ``raw`` holds inputs that
+    are used as given elsewhere (e.g. the similarity search, which partitions
+    on ``mainPosition`` values the model does not know); they are hashed
+    unchanged.
+    """
+    canonical = {}
+    for col, value in data.items():
+        value = _canonical(value)
+        if col in category_mappings and value not in category_mappings[col]:
+            value = None
+        canonical[col] = value
+    raw = sorted((col, _canonical(value)) for col, value in (raw or {}).items())
+    payload = json.dumps([version, sorted(canonical.items()), raw], default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def version_of(*paths):
+    """Combined version string of the files a prediction depends on."""
+    return "|".join(model_registry.model_version(path) for path in paths)
+
+
+class PredictionCache:
+    def __init__(self, maxsize=2048, ttl=6 * 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._fresh(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key):
+        """Like ``get``, but without counting a hit/miss or refreshing the entry's LRU position."""
+        with self._lock:
+            entry = self._fresh(key)
+            return None if entry is None else entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Shared by every session in the process
+cache = PredictionCache()
@@ -0,0 +1,93 @@
+"""Columnar, memory-mapped copy of the reference transfers in ``final_dataset.csv``.
+
+The CSV is converted once into an uncompressed Arrow IPC (Feather v2) file
+with string columns stored as categoricals. The file is memory-mapped and
+the resulting Arrow table is shared read-only by every session in the
+process, so opening another dashboard tab does not copy the dataset. Callers
+materialize only the columns they need as pandas frames.
+
+Every CSV gets its own Arrow file, named after its absolute path, and the
+CSV's ``(mtime_ns, size)`` signature is stored in the Arrow schema metadata.
+The Arrow file is regenerated whenever that signature changes, including
+when the CSV is replaced by a file with an older modification time.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+REFERENCE_PATH = "final_dataset.csv"
+STORE_DIR = ".cache"
+_SIGNATURE_KEY = b"source_signature"
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def store_path_for(csv_path):
+    """Arrow file holding the columnar copy of ``csv_path``."""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    digest = hashlib.sha1(os.path.abspath(csv_path).encode()).hexdigest()[:10]
+    return os.path.join(STORE_DIR, f"{name}-{digest}.arrow")
+
+
+def convert(csv_path=REFERENCE_PATH, store_path=None):
+    """Write the columnar copy of ``csv_path`` (and its signature) to ``store_path``."""
+    store_path = store_path or store_path_for(csv_path)
+    signature = _signature(csv_path)
+    df = pd.read_csv(csv_path)
+    for col in df.select_dtypes(include="object").columns:
+        df[col] = df[col].astype("category")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, _SIGNATURE_KEY: json.dumps(signature)})
+    store_dir = os.path.dirname(store_path) or "."
+    os.makedirs(store_dir, exist_ok=True)
+    # A private temporary file per writer, so concurrent conversions never write into the same file
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, store_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _stored_signature(store_path):
+    try:
+        with pa.memory_map(store_path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    signature = metadata.get(_SIGNATURE_KEY)
+    return json.loads(signature) if signature else None
+
+
+_lock = threading.Lock()
+_tables = {}  # absolute CSV path -> (signature, table)
+
+
+def get_table(csv_path=REFERENCE_PATH, store_path=None):
+    """Process-wide memory-mapped Arrow table of the reference data."""
+    store_path = store_path or store_path_for(csv_path)
+    key = os.path.abspath(csv_path)
+    signature = _signature(csv_path)
+    with _lock:
+        cached = _tables.get(key)
+        if cached is None or cached[0] != signature:
+            if _stored_signature(store_path) != signature:
+                convert(csv_path, store_path)
+            _tables[key] = (signature, feather.read_table(store_path, memory_map=True))
+        return _tables[key][1]
+
+
+def read_columns(columns, csv_path=REFERENCE_PATH, store_path=None):
+    """Materialize only ``columns`` of the reference data as a DataFrame."""
+    return get_table(csv_path, store_path).select(list(columns)).to_pandas()
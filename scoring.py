@@ -0,0 +1,161 @@
+"""Vectorized feature engineering and scoring shared by the dashboard and the batch tools.
+
+The functions here apply the same transformations as the single-row
+prediction path in ``app_final.py`` (engineered ratios, ``foreign_transfer``,
+categorical typing from ``category_mappings.json``), but as column operations
+over whole DataFrames so that thousands of candidates are scored in one
+``predict`` call.
+"""
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import model_registry
+
+MODEL_PATH = "model2.json"
+GAM_PATH = "gam_model.pkl"
+MAPPINGS_PATH = "category_mappings.json"
+
+FLAG_COLUMNS = ["isLoan", "wasLoan", "was_joker"]
+DERIVED_COLUMNS = ["value_per_age", "value_age_product", "team_market_value_relation", "foreign_transfer"]
+_FLAG_VALUES = {"true": 1, "false": 0, "1": 1, "0": 0, "1.0": 1, "0.0": 0}
+
+
+@lru_cache(maxsize=16)
+def _load_category_mappings(path, mtime):
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_category_mappings(path=MAPPINGS_PATH):
+    """Training categories per column, re-read when the file on disk changes."""
+    path = os.path.abspath(path)
+    return _load_category_mappings(path, os.path.getmtime(path))
+
+
+def _as_flag(series):
+    if series.dtype == bool:
+        return series.astype(int)
+    return series.map(lambda v: _FLAG_VALUES.get(str(v).strip().lower(), v) if pd.notna(v) else v)
+
+
+# derived column -> (required input columns, vectorized derivation)
+_DERIVATIONS = {
+    "value_per_age": (
+        ("marketvalue_closest", "transferAge"),
+        lambda df: (df["marketvalue_closest"] / df["transferAge"]).where(df["transferAge"] > 0, 0),
+    ),
+    "value_age_product": (
+        ("marketvalue_closest", "transferAge"),
+        lambda df: df["transferAge"] * df["marketvalue_closest"],
+    ),
+    "team_market_value_relation": (
+        ("toTeam_marketValue", "fromTeam_marketValue"),
+        lambda df: (df["toTeam_marketValue"] / df["fromTeam_marketValue"]).where(df["fromTeam_marketValue"] > 0, 0),
+    ),
+    "foreign_transfer": (
+        ("from_competition_competition_area", "to_competition_competition_area"),
+        lambda df: (df["from_competition_competition_area"] != df["to_competition_competition_area"]).astype(int),
+    ),
+}
+
+
+def engineer_features(df):
+    """Add the derived model inputs to a frame of raw candidate columns.
+
+    Values of derived columns already present in ``df`` are kept, which lets
+    test sets carrying their own engineered values be re-scored unchanged;
+    missing ones (absent column or NaN rows, e.g. in merged shortlists) are
+    derived, so a row gets the same inputs alone as in any batch.
+    Derivations whose inputs are missing (e.g. ``transferAge`` in the
+    attacker schema) are skipped.
+    """
+    df = df.copy()
+    for col, (inputs, derive) in _DERIVATIONS.items():
+        if not all(name in df.columns for name in inputs):
+            continue
+        if col not in df.columns:
+            df[col] = derive(df)
+        elif df[col].isna().any():
+            df[col] = df[col].fillna(derive(df))
+
+    for col in FLAG_COLUMNS:
+        if col in df.columns:
+            df[col] = _as_flag(df[col])
+    return df
+
+
+def encode_categories(df, category_mappings):
+    """Type every mapped column as a pandas Categorical with the training categories."""
+    for col, cats in category_mappings.items():
+        if col in df.columns:
+            if cats and all(isinstance(cat, bool) for cat in cats):
+                # Flags are 0/1 after engineer_features, which never match boolean categories
+                df[col] = df[col].map({0: False, 1: True})
+            df[col] = pd.Categorical(df[col], categories=cats)
+    return df
+
+
+def build_model_input(df, feature_names, category_mappings):
+    """Engineer, order and type ``df`` exactly as the model expects it."""
+    df = engineer_features(df)
+    model_input = df.reindex(columns=list(feature_names), fill_value=0)
+    # Columns that are entirely missing (e.g. JSON nulls) arrive as object dtype
+    for col in model_input.columns:
+        if col not in category_mappings and model_input[col].dtype == object:
+            model_input[col] = pd.to_numeric(model_input[col], errors="coerce")
+    return encode_categories(model_input, category_mappings)
+
+
+def profile_grid(profile, columns):
+    """Broadcast one feature dict into a frame with some columns varied per row.
+
+    ``columns`` maps column names to equal-length value sequences. Derived
+    features are dropped from ``profile`` so that ``engineer_features``
+    recomputes them for every row.
+    """
+    n_rows = len(next(iter(columns.values())))
+    base = {col: [value] * n_rows for col, value in profile.items() if col not in DERIVED_COLUMNS}
+    grid = pd.DataFrame(base)
+    for col, values in columns.items():
+        grid[col] = values
+    return grid
+
+
+def recommendation_band(predictions):
+    """Vectorized version of the dashboard's 35/55/75 recommendation thresholds."""
+    predictions = np.asarray(predictions)
+    return np.select(
+        [predictions < 35, predictions < 55, predictions < 75],
+        ["Not Recommended", "Expected to Be a Substitute", "Expected to Be a Rotation Player"],
+        default="Expected to Be a Key Player",
+    )
+
+
+def score_frame(df, model=None, gam_model=None, category_mappings=None, calibration=None):
+    """Score every row of ``df`` through XGBoost and the GAM metamodel.
+
+    Returns a copy of ``df`` with ``xgb_prediction``,
+    ``expected_playing_percentage`` and ``recommendation`` columns appended,
+    plus ``expected_playing_p10``/``expected_playing_p90`` when a residual
+    ``calibration`` of the expected playing percentage (see intervals.py,
+    ``engine.ModelSpec.calibration``) is given.
+    """
+    model = model if model is not None else model_registry.load_xgb_model(MODEL_PATH)
+    gam_model = gam_model if gam_model is not None else model_registry.load_gam_model(GAM_PATH)
+    category_mappings = category_mappings if category_mappings is not None else load_category_mappings()
+
+    model_input = build_model_input(df, model.feature_names_in_, category_mappings)
+    xgb_pred = model.predict(model_input)
+    final_pred = gam_model.predict(xgb_pred.reshape(-1, 1))
+
+    scored = df.copy()
+    scored["xgb_prediction"] = xgb_pred
+    scored["expected_playing_percentage"] = final_pred
+    if calibration is not None:
+        scored["expected_playing_p10"], scored["expected_playing_p90"] = calibration.interval(final_pred)
+    scored["recommendation"] = recommendation_band(final_pred)
+    return scored
@@ -0,0 +1,75 @@
+"""What-if sensitivity sweeps around a single player profile.
+
+Instead of moving one slider and re-running the dashboard per step, the
+profile is copied into a grid of perturbed rows (one feature varied for a
+response curve, two for a heatmap) and the whole grid is scored in a single
+XGBoost + GAM call. Derived features (``value_per_age``,
+``team_market_value_relation`` ...) are recomputed for every grid row.
+"""
+import numpy as np
+import pandas as pd
+
+import scoring
+
+# feature -> (label, lower bound, upper bound), matching the dashboard inputs
+SWEEP_FEATURES = {
+    "transferAge": ("Transfer Age", 16.0, 40.0),
+    "marketvalue_closest": ("Player Market Value (€M)", 0.0, 200.0),
+    "toTeam_marketValue": ("To Team Market Value (€M)", 0.0, 1000.0),
+    "percentage_played_before": ("Playing % Before", 0.0, 100.0),
+}
+
+
+def sweep_values(feature, current, n=50, width=0.5):
+    """``n`` values around ``current`` covering ``width`` of the feature's input range."""
+    _, lower, upper = SWEEP_FEATURES[feature]
+    half = (upper - lower) * width / 2
+    # Shift the window rather than shrink it when the input sits near a bound
+    start = max(lower, min(current - half, upper - 2 * half))
+    stop = min(upper, start + 2 * half)
+    return np.linspace(start, stop, n)
+
+
+def response_curves(profile, features=tuple(SWEEP_FEATURES), n=50, width=0.5):
+    """Expected playing percentage along each feature, scored in one batch.
+
+    Returns ``{feature: DataFrame(index=feature values, column "expected_playing_percentage")}``.
+    """
+    frames = []
+    for feature in features:
+        values = sweep_values(feature, float(profile[feature]), n, width)
+        frames.append(scoring.profile_grid(profile, {feature: values}).assign(_sweep=feature, _value=values))
+    scored = scoring.score_frame(pd.concat(frames, ignore_index=True))
+    return {
+        feature: part.set_index("_value")[["expected_playing_percentage"]].rename_axis(feature)
+        for feature, part in scored.groupby("_sweep", sort=False)
+    }
+
+
+def response_surface(profile, feature_x, feature_y, n=50, width=0.5):
+    """Expected playing percentage over an ``n`` x ``n`` grid of two features.
+
+    Returns ``(x_values, y_values, surface)`` with ``surface[i, j]`` scored at
+    ``(x_values[j], y_values[i])``.
+    """
+    x_values = sweep_values(feature_x, float(profile[feature_x]), n, width)
+    y_values = sweep_values(feature_y, float(profile[feature_y]), n, width)
+    xx, yy = np.meshgrid(x_values, y_values)
+    scored = scoring.score_frame(scoring.profile_grid(profile, {feature_x: xx.ravel(), feature_y: yy.ravel()}))
+    return x_values, y_values, scored["expected_playing_percentage"].to_numpy().reshape(len(y_values), len(x_values))
+
+
+def heatmap_figure(x_values, y_values, surface, feature_x, feature_y, marker=None):
+    """Matplotlib figure of a response surface (not registered with pyplot)."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(7, 5))
+    ax = fig.subplots()
+    mesh = ax.pcolormesh(x_values, y_values, surface, shading="auto", cmap="RdYlGn", vmin=0, vmax=100)
+    fig.colorbar(mesh, ax=ax, label="Expected Playing %")
+    if marker is not None:
+        ax.plot(*marker, marker="x", color="black", markersize=10)
+    ax.set_xlabel(SWEEP_FEATURES[feature_x][0])
+    ax.set_ylabel(SWEEP_FEATURES[feature_y][0])
+    fig.tight_layout()
+    return fig
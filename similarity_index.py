@@ -0,0 +1,443 @@
+"""Prebuilt nearest-neighbour index for the "similar transfers" lookup.
+
+The reference transfers are split into partitions keyed by
+(``mainPosition``, from level, to level). For each partition the one-hot
+encoding and standard scaling are done once at build time and stored as a
+contiguous float32 matrix, so a query only has to encode one input row and
+run a brute-force distance scan over that partition.
+
+Distances reproduce the original ``find_similar_players``: numeric features
+plus the one-hot columns of the categories present in the query, scaled with
+the partition's mean and standard deviation.
+
+Each partition stores every transfer of its players, each player's latest
+transfer first. A query without a level window scans those latest
+transfers; with a level window the filter runs first and each player
+contributes their latest transfer inside the window, so a player whose
+latest move is outside it is still found through an older one.
+
+The index is persisted with joblib and rebuilt incrementally when
+``final_dataset.csv`` changes: only partitions whose rows changed are
+re-encoded. It is written to a temporary file and moved into place, and an
+unreadable file (e.g. truncated by an interrupted run) is rebuilt.
+
+Partitions with at least ``ann_min_rows`` transfers additionally get an
+approximate (IVF) index: the scaled rows are clustered with k-means into
+about sqrt(n) cells, and ``query(..., nprobe=k)`` scans only the rows of the
+``k`` cells whose centroids are closest to the query, re-ranking them with
+the exact distance. Centroid distances use the same query-dependent columns
+as the exact path, which is why a coarse quantizer is used here rather than
+codes (PQ/LSH) fixed over the full one-hot vector. Larger ``nprobe`` trades
+latency for recall and ``nprobe=None`` is the exact scan;
+``find_similar_players_tiered`` and ``neighbourhood_stats`` use ``NPROBE``. Smaller partitions are always
+scanned exactly. ``benchmarks/ann_recall.py`` measures the trade-off.
+
+Rare position/level combinations can leave the exact partition with fewer
+than ``top_n`` transfers. ``TieredIndex`` keeps two more precomputed
+indexes, partitioned by ``mainPosition`` and by ``positionGroup``, and
+widens the search tier by tier (``TIERS``: adjacent levels, then the
+position group, then the position group at any level) until ``top_n``
+transfers are found. Each tier is a lookup in its own index followed by a
+vectorized level filter, and the result reports the tier that matched.
+
+``neighbourhood()`` summarizes ``percentage_played`` over the top-k (up to
+``MAX_NEIGHBOURS``) similar transfers: quantiles, mean and a histogram.
+Every partition stores the same summary over all of its transfers at build
+time, so when k covers the whole exact partition (the common case) the
+answer is a lookup rather than a scan.
+"""
+import os
+import pickle
+import struct
+import tempfile
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import reference_store
+
+REFERENCE_PATH = reference_store.REFERENCE_PATH
+
+SIMILARITY_FEATURES = [
+    "mainPosition",
+    "transferAge",
+    "marketvalue_closest",
+    "percentage_played_before",
+    "scorer_before_grouped_category",
+    "from_competition_competition_area",
+    "to_competition_competition_area",
+    "from_competition_competition_level",
+    "to_competition_competition_level",
+    "team_market_value_relation",
+]
+ID_COLUMNS = ["playerId", "playerName", "mainPosition", "percentage_played", "season"]
+PARTITION_COLUMNS = ["mainPosition", "from_competition_competition_level", "to_competition_competition_level"]
+RESULT_COLUMNS = ["playerName", "mainPosition", "season", "percentage_played", "distance"]
+REFERENCE_COLUMNS = list(dict.fromkeys(SIMILARITY_FEATURES + ID_COLUMNS))
+LEVEL_COLUMNS = ["from_competition_competition_level", "to_competition_competition_level"]
+TIERED_INDEX_PATH = os.path.join(".cache", "similarity_tiers.joblib")
+TIERED_REFERENCE_COLUMNS = REFERENCE_COLUMNS + ["positionGroup"]
+
+# index name -> partition columns
+TIER_INDEXES = {
+    "position_levels": PARTITION_COLUMNS,
+    "position": ["mainPosition"],
+    "group": ["positionGroup"],
+}
+# (tier, index, max level difference or None for any level), narrowest first
+TIERS = [
+    ("exact", "position_levels", None),
+    ("adjacent_levels", "position", 1),
+    ("position_group", "group", 1),
+    ("position_group_any_level", "group", None),
+]
+TIER_LABELS = {
+    "exact": "same position and levels",
+    "adjacent_levels": "same position, adjacent levels",
+    "position_group": "same position group, adjacent levels",
+    "position_group_any_level": "same position group, any level",
+}
+
+# Bumped when partitions gain fields; persisted indexes of another format are rebuilt
+FORMAT_VERSION = 3
+
+MAX_NEIGHBOURS = 500
+MIN_NEIGHBOURS = 20
+PLAYING_TIME_QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+PLAYING_TIME_BINS = np.linspace(0, 100, 11)
+
+ANN_MIN_ROWS = 50_000
+NPROBE = 8
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_CELL = 32
+_BLOCK_ROWS = 8192
+
+
+def partition_key(*values):
+    return tuple(str(value) if isinstance(value, str) else float(value) for value in values)
+
+
+def _fingerprint(rows):
+    return int(pd.util.hash_pandas_object(rows, index=False).sum())
+
+
+def _squared_distances(points, centroids):
+    """Squared Euclidean distances between every row of ``points`` and ``centroids``."""
+    return (
+        np.einsum("ij,ij->i", points, points)[:, None]
+        - 2 * points @ centroids.T
+        + np.einsum("ij,ij->i", centroids, centroids)[None, :]
+    )
+
+
+def _assign(points, centroids):
+    return np.concatenate([
+        _squared_distances(points[start:start + _BLOCK_ROWS], centroids).argmin(axis=1)
+        for start in range(0, len(points), _BLOCK_ROWS)
+    ])
+
+
+def _build_ivf(matrix, seed=0):
+    """k-means cells over ``matrix``; rows are stored grouped by cell."""
+    n_cells = max(1, int(np.sqrt(len(matrix))))
+    rng = np.random.default_rng(seed)
+    sample = matrix[rng.choice(len(matrix), min(len(matrix), n_cells * KMEANS_SAMPLE_PER_CELL), replace=False)]
+    centroids = sample[rng.choice(len(sample), n_cells, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        labels = _assign(sample, centroids)
+        counts = np.bincount(labels, minlength=n_cells)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+
+    labels = _assign(matrix, centroids)
+    order = np.argsort(labels, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=n_cells))])
+    return {"centroids": centroids, "order": order, "offsets": offsets}
+
+
+def summarize_playing_time(values):
+    """Empirical distribution of ``percentage_played`` values."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return {"n": 0, "mean": None, "quantiles": {}, "histogram": {"edges": PLAYING_TIME_BINS.tolist(), "counts": []}}
+    counts, _ = np.histogram(np.clip(values, PLAYING_TIME_BINS[0], PLAYING_TIME_BINS[-1]), PLAYING_TIME_BINS)
+    return {
+        "n": int(len(values)),
+        "mean": float(values.mean()),
+        "quantiles": {
+            f"P{round(q * 100)}": float(v)
+            for q, v in zip(PLAYING_TIME_QUANTILES, np.quantile(values, PLAYING_TIME_QUANTILES))
+        },
+        "histogram": {"edges": PLAYING_TIME_BINS.tolist(), "counts": counts.tolist()},
+    }
+
+
+def _build_partition(rows, ann_min_rows=ANN_MIN_ROWS):
+    rows = rows.sort_values("season", ascending=False, kind="stable")
+    latest = ~rows["playerId"].duplicated()
+    # Latest transfer of every player first (rows [0, n_latest)), then the older ones, newest first
+    rows = pd.concat([rows[latest], rows[~latest]]).reset_index(drop=True)
+    n_latest = int(latest.sum())
+    encoded = pd.get_dummies(rows[SIMILARITY_FEATURES]).astype(np.float64)
+    values = encoded.to_numpy()
+    # Scaled as one transfer per player, whatever older transfers the partition also holds
+    mean = values[:n_latest].mean(axis=0)
+    scale = values[:n_latest].std(axis=0)
+    scale[scale < 10 * np.finfo(np.float64).eps] = 1.0
+    matrix = np.ascontiguousarray((values - mean) / scale, dtype=np.float32)
+    return {
+        "rows": rows[[c for c in RESULT_COLUMNS if c != "distance"]],
+        "levels": rows[LEVEL_COLUMNS].to_numpy(np.float32),
+        "players": pd.factorize(rows["playerId"])[0],
+        "n_latest": n_latest,
+        "columns": {col: i for i, col in enumerate(encoded.columns)},
+        "matrix": matrix,
+        "mean": mean,
+        "scale": scale,
+        "ivf": _build_ivf(matrix) if ann_min_rows is not None and len(matrix) >= ann_min_rows else None,
+        "summary": summarize_playing_time(rows["percentage_played"].iloc[:n_latest]),
+    }
+
+
+def prepare_reference(df, columns=REFERENCE_COLUMNS):
+    """Restrict a raw reference frame to complete rows of the similarity columns."""
+    df = df[columns].dropna()
+    for col in df.select_dtypes(include=["object", "category"]).columns:
+        df[col] = df[col].astype(str)
+    return df
+
+
+class SimilarityIndex:
+    partition_columns = PARTITION_COLUMNS
+
+    def __init__(self, ann_min_rows=ANN_MIN_ROWS, partition_columns=PARTITION_COLUMNS):
+        self.format_version = FORMAT_VERSION
+        self.ann_min_rows = ann_min_rows
+        self.partition_columns = list(partition_columns)
+        self.partitions = {}
+        self.fingerprints = {}
+        self.source_signature = None
+
+    def update(self, df):
+        """Re-encode the partitions of ``df`` that differ from the indexed ones.
+
+        Returns the number of partitions that were (re)built.
+        """
+        df = prepare_reference(df, list(dict.fromkeys(REFERENCE_COLUMNS + self.partition_columns)))
+        seen = set()
+        rebuilt = 0
+        for key, rows in df.groupby(self.partition_columns, sort=False):
+            key = partition_key(*key)
+            seen.add(key)
+            fingerprint = _fingerprint(rows)
+            if self.fingerprints.get(key) != fingerprint:
+                # Indexes persisted before the IVF option existed have no ann_min_rows
+                self.partitions[key] = _build_partition(rows, getattr(self, "ann_min_rows", ANN_MIN_ROWS))
+                self.fingerprints[key] = fingerprint
+                rebuilt += 1
+        for key in set(self.partitions) - seen:
+            del self.partitions[key]
+            del self.fingerprints[key]
+        return rebuilt
+
+    def query(self, input_data, top_n=3, nprobe=None, level_window=None):
+        """Return the ``top_n`` reference transfers closest to ``input_data``, at most one per player.
+
+        With ``nprobe``, partitions that have an IVF index are searched
+        approximately over the rows of the ``nprobe`` nearest cells. With
+        ``level_window``, only transfers whose from/to levels differ from the
+        input's by at most that much are considered, and each player is
+        represented by their latest such transfer.
+        """
+        part = self.partitions.get(partition_key(*(input_data[col] for col in self.partition_columns)))
+        if part is None:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        columns = part["columns"]
+        idx, values = [], []
+        for feature in SIMILARITY_FEATURES:
+            value = input_data[feature]
+            if isinstance(value, str):
+                col, value = f"{feature}_{value}", 1.0
+            else:
+                col = feature
+            if col in columns:
+                idx.append(columns[col])
+                values.append(value)
+        idx = np.array(idx)
+        query = ((np.array(values, dtype=np.float64) - part["mean"][idx]) / part["scale"][idx]).astype(np.float32)
+
+        # None: the latest transfer of every player, rows [0, n_latest)
+        candidates = None
+        if level_window is not None:
+            target = np.array([input_data[col] for col in LEVEL_COLUMNS], dtype=np.float32)
+            eligible = np.flatnonzero((np.abs(part["levels"] - target) <= level_window).all(axis=1))
+            # Rows are ordered latest first, so a player's first eligible row is their latest one in the window
+            _, first = np.unique(part["players"][eligible], return_index=True)
+            candidates = eligible[np.sort(first)]
+            if len(candidates) == 0:
+                return pd.DataFrame(columns=RESULT_COLUMNS)
+        ivf = part.get("ivf")
+        if nprobe is not None and ivf is not None:
+            probed = np.zeros(len(part["matrix"]), dtype=bool)
+            probed[_probe(ivf, idx, query, nprobe)] = True
+            pool = np.arange(part["n_latest"]) if candidates is None else candidates
+            narrowed = pool[probed[pool]]
+            if len(narrowed) >= top_n:
+                candidates = narrowed
+        if candidates is None:
+            matrix = part["matrix"][:part["n_latest"], idx]
+        else:
+            matrix = part["matrix"][np.ix_(candidates, idx)]
+
+        diff = matrix - query
+        distances = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+        n = min(top_n, len(distances))
+        nearest = np.argpartition(distances, n - 1)[:n] if n < len(distances) else np.arange(n)
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        distances = distances[nearest]
+        if candidates is not None:
+            nearest = candidates[nearest]
+
+        result = part["rows"].iloc[nearest].copy()
+        result["distance"] = distances
+        return result[RESULT_COLUMNS]
+
+
+def _neighbourhood(index, input_data, k, nprobe, level_window):
+    part = index.partitions.get(partition_key(*(input_data[col] for col in index.partition_columns)))
+    if part is None:
+        return summarize_playing_time([])
+    if level_window is None and k >= part["n_latest"]:
+        # The top-k is the whole partition: precomputed at build time
+        return part["summary"]
+    return summarize_playing_time(index.query(input_data, k, nprobe, level_window)["percentage_played"].to_numpy())
+
+
+def _probe(ivf, idx, query, nprobe):
+    """Row numbers in the ``nprobe`` cells nearest to ``query`` (over columns ``idx``)."""
+    diff = ivf["centroids"][:, idx] - query
+    cell_distances = np.einsum("ij,ij->i", diff, diff)
+    nprobe = min(nprobe, len(cell_distances))
+    cells = np.argpartition(cell_distances, nprobe - 1)[:nprobe]
+    offsets = ivf["offsets"]
+    return np.concatenate([ivf["order"][offsets[cell]:offsets[cell + 1]] for cell in cells])
+
+
+class TieredIndex:
+    """Similarity search that widens its filters until ``top_n`` transfers are found."""
+
+    def __init__(self, ann_min_rows=ANN_MIN_ROWS):
+        self.indexes = {
+            name: SimilarityIndex(ann_min_rows, columns) for name, columns in TIER_INDEXES.items()
+        }
+        self.format_version = FORMAT_VERSION
+        self.source_signature = None
+
+    def update(self, df):
+        return sum(index.update(df) for index in self.indexes.values())
+
+    def neighbourhood(self, input_data, k=100, min_neighbours=MIN_NEIGHBOURS, nprobe=None):
+        """Return ``(summary, tier)`` of ``percentage_played`` over the ``k`` most similar transfers.
+
+        The search widens like ``query`` until a tier has at least
+        ``min_neighbours`` transfers.
+        """
+        k = min(k, MAX_NEIGHBOURS)
+        for tier, index_name, level_window in TIERS:
+            summary = _neighbourhood(self.indexes[index_name], input_data, k, nprobe, level_window)
+            if summary["n"] >= min(k, min_neighbours):
+                break
+        return summary, tier
+
+    def query(self, input_data, top_n=3, nprobe=None):
+        """Return ``(transfers, tier)`` from the narrowest tier with ``top_n`` matches.
+
+        If even the widest tier has fewer, its (possibly empty) result is returned.
+        """
+        for tier, index_name, level_window in TIERS:
+            result = self.indexes[index_name].query(input_data, top_n, nprobe, level_window)
+            if len(result) >= top_n:
+                break
+        return result, tier
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+# What joblib.load raises on a truncated, corrupt or incompatible file
+_LOAD_ERRORS = (EOFError, OSError, ValueError, struct.error, pickle.UnpicklingError, AttributeError, ImportError)
+
+
+def _load(index_path):
+    if not os.path.exists(index_path):
+        return None
+    try:
+        return joblib.load(index_path)
+    except _LOAD_ERRORS:
+        return None
+
+
+def load_or_build(reference_path=REFERENCE_PATH, index_path=TIERED_INDEX_PATH,
+                  factory=TieredIndex, columns=TIERED_REFERENCE_COLUMNS):
+    """Load the persisted index, refreshing it first if the reference file changed."""
+    signature = _source_signature(reference_path)
+    index = _load(index_path)
+    if getattr(index, "format_version", None) != FORMAT_VERSION:
+        index = factory()
+    if index.source_signature != signature:
+        index.update(reference_store.read_columns(columns, reference_path))
+        index.source_signature = signature
+        index_dir = os.path.dirname(index_path) or "."
+        os.makedirs(index_dir, exist_ok=True)
+        # A private temporary file per writer, so concurrent rebuilds never write into the same file
+        fd, tmp_path = tempfile.mkstemp(dir=index_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            joblib.dump(index, tmp_path)
+            os.replace(tmp_path, index_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    return index
+
+
+_lock = threading.Lock()
+_tiered_index = None
+
+
+def get_tiered_index(reference_path=REFERENCE_PATH, index_path=TIERED_INDEX_PATH):
+    """Process-wide ``TieredIndex``, reloaded only when the reference file changes on disk."""
+    global _tiered_index
+    with _lock:
+        if _tiered_index is None or _tiered_index.source_signature != _source_signature(reference_path):
+            _tiered_index = load_or_build(reference_path, index_path)
+        return _tiered_index
+
+
+def find_similar_players_tiered(input_data, top_n=3, nprobe=NPROBE):
+    """``(transfers, tier)``; ``input_data`` also needs ``positionGroup``."""
+    return get_tiered_index().query(input_data, top_n, nprobe)
+
+
+def neighbourhood_stats(input_data, k=100, nprobe=NPROBE):
+    """``(summary, tier)`` of ``percentage_played`` over the ``k`` most similar transfers."""
+    return get_tiered_index().neighbourhood(input_data, k, nprobe=nprobe)
+
+
+def _build_all():
+    tiered = load_or_build()
+    print(f"tiers: {', '.join(f'{name} {len(i.partitions)}' for name, i in tiered.indexes.items())} partitions -> {TIERED_INDEX_PATH}")
+
+
+if __name__ == "__main__":
+    # Build through the importable module so the pickled classes resolve as similarity_index.*
+    import similarity_index
+
+    similarity_index._build_all()
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+import fast_encoder
+import scoring
+
+N_ROWS = 300
+
+
+@pytest.mark.parametrize("spec", engine.SPECS, ids=lambda spec: spec.name)
+def test_fast_path_matches_dataframe_path(spec):
+    df = pd.read_csv(spec.calibration_path, nrows=N_ROWS)
+    part = scoring.engineer_features(spec.prepare(df) if spec.prepare is not None else df)
+    model = spec.model()
+
+    expected = model.predict(scoring.build_model_input(part, spec.feature_names, spec.category_mappings))
+    encoder = fast_encoder.get_encoder(model, spec.category_mappings)
+    rows = part.reindex(columns=spec.feature_names).to_dict(orient="records")
+    actual = np.array([encoder.predict(row)[0] for row in rows])
+
+    assert len(actual) == N_ROWS
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-4)
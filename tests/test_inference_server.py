@@ -0,0 +1,35 @@
+from concurrent.futures import wait
+
+import pandas as pd
+import pytest
+
+import engine
+import inference_server
+
+
+def _requests():
+    df = pd.read_csv("xgboost_predictions_test.csv", nrows=40).drop(columns=["Actual", "Predicted", "Residual"])
+    rows = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    # The first request leaves derived and flag columns to the server, the second sends them
+    partial = [{k: v for k, v in row.items() if k not in ("value_per_age", "was_joker")} for row in rows[:20]]
+    return [partial, rows[20:]]
+
+
+@pytest.mark.parametrize("route", [False, True], ids=["general", "routed"])
+def test_batched_predictions_match_solo(route):
+    batcher = inference_server.MicroBatcher(window_ms=500, specs=engine.SPECS if route else None)
+    requests = _requests()
+
+    solo = [batcher.submit(rows).result() for rows in requests]
+    batches = batcher.batches
+    futures = [batcher.submit(rows) for rows in requests]
+    wait(futures)
+
+    assert batcher.batches == batches + 1
+    assert [future.result() for future in futures] == solo
+
+
+def test_non_numeric_values_are_reported():
+    columns = inference_server.MicroBatcher().numeric_columns
+    rows = [{"transferAge": "abc"}, {"transferAge": "25", "height": 180}]
+    assert inference_server.invalid_values(rows, columns) == ["non-numeric transferAge in row 0"]
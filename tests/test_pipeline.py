@@ -0,0 +1,62 @@
+"""``pipeline.run`` keeps memory flat on a file many chunks long.
+
+The file is small enough for a unit test; ``benchmarks/large_file.py`` is
+the full larger-than-RAM run.
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import large_file  # noqa: E402
+
+SIZE_MB = 32
+CHUNK_SIZE = 5_000
+# Allowed growth over a one-chunk run; holding the whole file costs about 250 MB
+BUDGET_MB = 128
+
+_RUN = """
+import json, resource, sys
+import pipeline
+stats = pipeline.run(sys.argv[1], sys.argv[2], int(sys.argv[3]))
+with open("/proc/self/status") as f:
+    vm_peak_kb = int(f.read().split("VmPeak:")[1].split()[0])
+print(json.dumps({"rows": stats.rows, "vm_peak_mb": vm_peak_kb / 1024,
+                  "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def _run(input_path, output_path, chunk_size, address_space_mb=None):
+    def limit():
+        if address_space_mb is not None:
+            limit_bytes = int(address_space_mb * 2**20)
+            resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, limit_bytes))
+
+    result = subprocess.run([sys.executable, "-c", _RUN, input_path, output_path, str(chunk_size)],
+                            cwd=ROOT, preexec_fn=limit, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_run_streams_in_bounded_memory(tmp_path):
+    input_path = str(tmp_path / "candidates.csv")
+    n_rows = large_file.write_candidates(input_path, SIZE_MB)
+    assert n_rows > 20 * CHUNK_SIZE
+
+    # Fixed cost of the interpreter, the models and one chunk
+    small_path = str(tmp_path / "small.csv")
+    with open(input_path) as src, open(small_path, "w") as dst:
+        dst.writelines(line for _, line in zip(range(CHUNK_SIZE + 1), src))
+    baseline = _run(small_path, str(tmp_path / "small_scored.csv"), CHUNK_SIZE)
+
+    output_path = str(tmp_path / "scored.csv")
+    result = _run(input_path, output_path, CHUNK_SIZE, address_space_mb=baseline["vm_peak_mb"] + BUDGET_MB)
+
+    assert result["rows"] == n_rows
+    with open(output_path) as f:
+        assert sum(1 for _ in f) == n_rows + 1
+    assert result["max_rss_mb"] < baseline["max_rss_mb"] + BUDGET_MB
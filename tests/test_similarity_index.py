@@ -0,0 +1,34 @@
+import pandas as pd
+
+import similarity_index
+
+
+def _transfer(player, season, level, played):
+    return {
+        "playerId": player, "playerName": f"Player {player}", "season": season, "percentage_played": played,
+        "mainPosition": "centerback", "positionGroup": "defender", "transferAge": 24.0,
+        "marketvalue_closest": 2.0, "percentage_played_before": 60.0, "scorer_before_grouped_category": "0",
+        "from_competition_competition_area": "Germany", "to_competition_competition_area": "Germany",
+        "from_competition_competition_level": level, "to_competition_competition_level": level,
+        "team_market_value_relation": 1.0,
+    }
+
+
+def test_level_window_keeps_older_transfers_inside_the_window():
+    reference = pd.DataFrame([
+        _transfer(1, 2024, 1.0, 80.0),  # latest transfer, outside the window
+        _transfer(1, 2019, 3.0, 40.0),  # older transfer, inside it
+        _transfer(2, 2023, 3.0, 55.0),
+        _transfer(3, 2022, 2.0, 65.0),
+    ])
+    index = similarity_index.SimilarityIndex(partition_columns=["mainPosition"])
+    index.update(reference)
+    query = _transfer(0, 2025, 3.0, None)
+
+    windowed = index.query(query, top_n=10, level_window=0)
+    assert sorted(windowed["playerName"]) == ["Player 1", "Player 2"]
+    assert windowed.set_index("playerName").loc["Player 1", "season"] == 2019
+
+    # Without a window every player is represented by their latest transfer
+    latest = index.query(query, top_n=10)
+    assert latest.set_index("playerName")["season"].to_dict() == {"Player 1": 2024, "Player 2": 2023, "Player 3": 2022}